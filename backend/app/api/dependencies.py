@@ -1,9 +1,34 @@
+import hmac
+from typing import Optional
 from fastapi import Depends
+from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel import Session
-from mnemonic import Mnemonic
-from app.db.session import get_session
+from app.core.config import settings
+from app.core.exceptions import AuthError, ForbiddenError
+from app.core.sessions import SessionClaims, session_manager
+from app.db.session import get_session, get_async_session
+from app.services.mnemonics import mnemonic_pool
 
-def get_mnemonic_generator():
-    return Mnemonic("english")
+_bearer = HTTPBearer(auto_error=False)
+_admin_token = APIKeyHeader(name="X-Admin-Token", auto_error=False)
 
-get_db = get_session
\ No newline at end of file
+def get_mnemonic_pool():
+    return mnemonic_pool
+
+def get_current_session(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> SessionClaims:
+    # Checked against the signing key and revocation filter only; no DB lookup
+    if credentials is None:
+        raise AuthError("Missing session token")
+    claims, reason = session_manager.validate(credentials.credentials)
+    if claims is None:
+        raise AuthError(f"Invalid session token: {reason}")
+    return claims
+
+def require_admin(token: Optional[str] = Depends(_admin_token)) -> None:
+    if not settings.ADMIN_API_TOKEN:
+        raise ForbiddenError("Admin endpoints are disabled")
+    if token is None or not hmac.compare_digest(token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise AuthError("Invalid admin token")
+
+get_db = get_session
+get_async_db = get_async_session
\ No newline at end of file
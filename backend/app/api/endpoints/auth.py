@@ -1,24 +1,34 @@
 from typing import Dict
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.db.models import User
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
 from app.core.exceptions import AuthError, NotFoundError, ConflictError
 from app.schemas.auth import (
-    ChallengeRequest, ChallengeResponse, LoginRequest, SchnorrLoginRequest,
-    LoginResponse, SignupRequest, SignupResponse, MnemonicResponse, ResolveUserRequest
+    ChallengeRequest, ChallengeResponse, SchnorrLoginRequest,
+    LoginResponse, LogoutResponse, SignupRequest, SignupResponse, MnemonicResponse, ResolveUserRequest,
+    BatchLoginRequest, BatchLoginResponse, BulkSignupRequest, BulkSignupResponse
 )
 from app.services.auth import AuthService
-from app.api.dependencies import get_db, get_mnemonic_generator
-from app.db.crud.users import user as user_crud
+from app.services.bulk_signup import import_users
+from app.api.dependencies import get_db, get_async_db, get_mnemonic_pool, get_current_session, require_admin
+from app.core.sessions import SessionClaims, session_manager
+from app.db.crud.users import CONFLICT_LABELS, user_async as user_crud
 from loguru import logger
 
 router = APIRouter()
 
+def _signup_conflict(req: SignupRequest, conflicts) -> ConflictError:
+    field = CONFLICT_LABELS[conflicts[0]] if conflicts else "Username"
+    logger.warning(f"Signup failed for '{req.username}': Conflict - {field} already exists.")
+    return ConflictError(f"{field} already registered")
+
 @router.get("/signup-mnemonics", response_model=MnemonicResponse)
-async def get_signup_mnemonics(mnemonic_generator = Depends(get_mnemonic_generator)):
+async def get_signup_mnemonics(mnemonic_pool = Depends(get_mnemonic_pool)):
     logger.debug("Generating mnemonics requested.")
     try:
-        mnemonics = [mnemonic_generator.generate(strength=128) for _ in range(3)]
+        mnemonics = mnemonic_pool.take(3)
         logger.info(f"Generated {len(mnemonics)} mnemonics for signup selection.")
         return MnemonicResponse(mnemonics=mnemonics)
     except Exception as e:
@@ -26,25 +36,18 @@ async def get_signup_mnemonics(mnemonic_generator = Depends(get_mnemonic_generat
         raise HTTPException(status_code=500, detail="Failed to generate recovery phrase options")
 
 @router.post("/signup", response_model=SignupResponse, status_code=status.HTTP_201_CREATED)
-async def signup(req: SignupRequest, db: Session = Depends(get_db)):
+async def signup(req: SignupRequest, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Signup attempt for username='{req.username}', email='{req.email}', pubkey='{req.pubkey[:10]}...'")
 
-    if user_crud.exists_by_fields(db, username=req.username, email=req.email, pubkey=req.pubkey):
-        field = "Username"
-        existing_user = None
-        
-        if existing_user := user_crud.get_by_username(db, username=req.username):
-            field = "Username"
-        elif existing_user := user_crud.get_by_email(db, email=req.email):
-            field = "Email"
-        elif existing_user := user_crud.get_by_pubkey(db, pubkey=req.pubkey):
-            field = "Public key"
-            
-        logger.warning(f"Signup failed for '{req.username}': Conflict - {field} already exists.")
-        raise ConflictError(f"{field} already registered")
+    if not settings.SIGNUP_INSERT_FIRST:
+        conflicts = await user_crud.find_conflicts(db, username=req.username, email=req.email, pubkey=req.pubkey)
+        if conflicts:
+            raise _signup_conflict(req, conflicts)
 
     try:
-        user = AuthService.create_user(
+        # In insert-first mode the unique indexes on User do the checking; the
+        # conflict lookup only runs when the insert actually collides.
+        user = await AuthService.create_user_async(
             session=db,
             username=req.username,
             email=req.email,
@@ -53,40 +56,56 @@ async def signup(req: SignupRequest, db: Session = Depends(get_db)):
         )
         logger.success(f"User '{user.username}' registered successfully (ID: {user.id}).")
         return SignupResponse(success=True, message="Signup successful! You can now log in.")
+    except IntegrityError:
+        await db.rollback()
+        conflicts = await user_crud.find_conflicts(db, username=req.username, email=req.email, pubkey=req.pubkey)
+        raise _signup_conflict(req, conflicts)
     except Exception as e:
         logger.error(f"Database error during signup: {e}")
         raise HTTPException(status_code=500, detail="Failed to save user data")
 
+@router.post("/signup/bulk", response_model=BulkSignupResponse, dependencies=[Depends(require_admin)])
+def signup_bulk(req: BulkSignupRequest, db: Session = Depends(get_db)):
+    logger.info(f"Bulk signup with {len(req.users)} rows")
+    
+    try:
+        results = list(import_users(db, req.users))
+    except Exception as e:
+        logger.error(f"Database error during bulk signup: {e}")
+        raise HTTPException(status_code=500, detail="Failed to save user data")
+    
+    created = sum(r.status == "created" for r in results)
+    logger.success(f"Bulk signup finished: {created}/{len(results)} users created")
+    return BulkSignupResponse(created=created, failed=len(results) - created, results=results)
+
 @router.post("/challenge", response_model=ChallengeResponse)
-async def get_auth_challenge(req: ChallengeRequest, db: Session = Depends(get_db)):
-    logger.info(f"Challenge requested for pubkey: '{req.pubkey[:10]}...'")
+async def get_auth_challenge(req: ChallengeRequest, db: AsyncSession = Depends(get_async_db)):
+    logger.debug("Challenge requested for pubkey: '{}...'", req.pubkey[:10])
     
-    user = user_crud.get_by_pubkey(db, pubkey=req.pubkey)
+    user = await user_crud.get_by_pubkey(db, pubkey=req.pubkey)
     if not user:
         logger.warning(f"Challenge requested for non-existent pubkey: '{req.pubkey[:10]}...'")
         raise NotFoundError("No account found with this identifier")
     
-    challenge = AuthService.create_challenge(req.pubkey)
+    challenge = await AuthService.create_challenge_async(req.pubkey)
     logger.info(f"Generated challenge '{challenge[:8]}...' for pubkey '{req.pubkey[:10]}...'")
     
     return ChallengeResponse(challengeHex=challenge)
 
 @router.post("/login", response_model=LoginResponse)
-async def login(req: SchnorrLoginRequest, db: Session = Depends(get_db)):
-    logger.info(f"Login attempt for pubkey: '{req.pubkey[:10]}...'")
+async def login(req: SchnorrLoginRequest, db: AsyncSession = Depends(get_async_db)):
+    logger.debug("Login attempt for pubkey: '{}...'", req.pubkey[:10])
     
-    user = user_crud.get_by_pubkey(db, pubkey=req.pubkey)
+    user = await user_crud.get_by_pubkey(db, pubkey=req.pubkey)
     if not user:
         logger.warning(f"Login attempt for non-existent pubkey: '{req.pubkey[:10]}...'")
         raise NotFoundError("User not found")
     
-    logger.debug(f"Schnorr ZKP authentication for user '{user.username}':")
-    logger.debug(f"  R: {req.R_hex[:16]}...")
-    logger.debug(f"  s: {req.s_hex[:16]}...")
-    logger.debug(f"  challenge: {req.challengeHex[:16]}...")
+    logger.debug("Schnorr ZKP authentication for user '{}' ({}): challenge={}...", user.username,
+                 "bip340" if req.signature_hex else "commitment", req.challengeHex[:16])
     
-    success, error_msg = AuthService.verify_login(
-        req.pubkey, req.challengeHex, req.R_hex, req.s_hex
+    success, error_msg = await AuthService.verify_login(
+        req.pubkey, req.challengeHex, req.R_hex, req.s_hex, req.signature_hex
     )
     
     if not success:
@@ -94,19 +113,61 @@ async def login(req: SchnorrLoginRequest, db: Session = Depends(get_db)):
         raise AuthError(f"Authentication failed: {error_msg}")
     
     logger.success(f"Login successful for user '{user.username}' (pubkey: {req.pubkey[:10]}...)")
-    return LoginResponse(success=True, message="Login successful!", username=user.username)
+    token, expires_at = session_manager.issue(user.id)
+    return LoginResponse(success=True, message="Login successful!", username=user.username,
+                         session_token=token, expires_at=expires_at)
+
+@router.post("/login/batch", response_model=BatchLoginResponse)
+async def login_batch(req: BatchLoginRequest, db: AsyncSession = Depends(get_async_db)):
+    logger.info(f"Batch login attempt with {len(req.items)} items")
+    
+    pubkeys = [item.pubkey for item in req.items]
+    users = {u.pubkey: u for u in await user_crud.get_multi_by_pubkeys(db, pubkeys=pubkeys)}
+    known = [item for item in req.items if item.pubkey in users]
+    verified = iter(await AuthService.verify_login_batch(
+        [(item.pubkey, item.challengeHex, item.R_hex, item.s_hex, item.signature_hex) for item in known]
+    ))
+    
+    results = []
+    for item in req.items:
+        user = users.get(item.pubkey)
+        if not user:
+            results.append(LoginResponse(success=False, message="User not found"))
+            continue
+        
+        success, error_msg = next(verified)
+        if success:
+            token, expires_at = session_manager.issue(user.id)
+            results.append(LoginResponse(success=True, message="Login successful!", username=user.username,
+                                         session_token=token, expires_at=expires_at))
+        else:
+            results.append(LoginResponse(success=False, message=f"Authentication failed: {error_msg}"))
+    
+    logger.info(f"Batch login finished: {sum(r.success for r in results)}/{len(results)} successful")
+    return BatchLoginResponse(results=results)
+
+@router.post("/logout", response_model=LogoutResponse)
+async def logout(session: SessionClaims = Depends(get_current_session)):
+    """Revoke the caller's session token.
+
+    Revocations are kept per worker process, so with more than one worker the
+    token is only rejected by this one and stays valid elsewhere until it expires.
+    """
+    session_manager.revoke(session)
+    logger.info(f"Session revoked for user ID {session.user_id}")
+    return LogoutResponse(success=True, message="Logged out")
 
 @router.post("/resolve-user", response_model=Dict[str, str])
-async def resolve_user(request: ResolveUserRequest, db: Session = Depends(get_db)):
+async def resolve_user(request: ResolveUserRequest, db: AsyncSession = Depends(get_async_db)):
     identifier = request.identifier
     is_email = request.is_email
     
     logger.info(f"Resolving {'email' if is_email else 'username'}: {identifier}")
     
     if is_email:
-        user = user_crud.get_by_email(db, email=identifier)
+        user = await user_crud.get_by_email(db, email=identifier)
     else:
-        user = user_crud.get_by_username(db, username=identifier)
+        user = await user_crud.get_by_username(db, username=identifier)
     
     if not user:
         logger.warning(f"User not found for identifier: {identifier}")
@@ -0,0 +1,35 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.api.dependencies import require_admin
+from app.api.responses import ORJSONResponse
+from app.core.metrics import REGISTRY
+from app.core.executors import executor_stats
+from app.core.ratelimit import rate_limit_stats
+from app.core.security import challenge_store, pubkey_cache_stats
+from app.core.sessions import session_manager
+from app.db.crud.users import user_cache
+from app.db.pool import pool_stats
+from app.services.mnemonics import mnemonic_pool
+
+# Both expose pool, queue and rate-limit internals, so they need X-Admin-Token
+router = APIRouter(dependencies=[Depends(require_admin)])
+# Mounted at the application root as /metrics, in Prometheus text format
+prometheus_router = APIRouter(dependencies=[Depends(require_admin)])
+
+@prometheus_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/", response_model=Dict[str, Any], response_class=ORJSONResponse)
+async def get_metrics():
+    return {
+        "executors": executor_stats(),
+        "challenge_store": challenge_store.stats(),
+        "sessions": session_manager.stats(),
+        "rate_limits": rate_limit_stats(),
+        "user_cache": user_cache.stats(),
+        "pubkey_cache": pubkey_cache_stats(),
+        "db_pools": pool_stats(),
+        "mnemonic_pool": mnemonic_pool.stats(),
+    }
\ No newline at end of file
@@ -1,15 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.db.models import User
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from app.db.session import engine
 from app.schemas.user import UserResponse, UserUpdate
 from app.db.crud.users import user as user_crud
-from app.api.dependencies import get_db
-from app.core.exceptions import NotFoundError
+from app.api.dependencies import get_db, get_current_session
+from app.core.sessions import SessionClaims
+from app.api.utils import encode_cursor, decode_cursor
+from app.api.responses import RowSerializer
+from app.core.config import settings
+from app.core.exceptions import ForbiddenError, NotFoundError
 from loguru import logger
-from typing import List
+from typing import List, Optional
 
 router = APIRouter()
 
+# Rows in UserResponse field order, for the list and export routes
+user_rows = RowSerializer(UserResponse)
+
+def _export_lines():
+    # Own session: the request-scoped one is closed before a streaming body is sent
+    with Session(engine) as db:
+        for rows in user_crud.iter_column_batches(
+            db, columns=user_rows.columns, batch_size=settings.USERS_EXPORT_BATCH_SIZE
+        ):
+            yield user_rows.dumps_lines(rows)
+
+@router.get("/export")
+def export_users():
+    logger.info("Streaming NDJSON export of users")
+    return StreamingResponse(_export_lines(), media_type="application/x-ndjson")
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(user_id: int, db: Session = Depends(get_db)):
     user = user_crud.get(db, id=user_id)
@@ -20,17 +41,28 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 @router.get("/", response_model=List[UserResponse])
 def get_users(
     skip: int = 0, 
-    limit: int = 100, 
+    limit: int = Query(100, ge=1, le=1000), 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return user_crud.get_multi(db, skip=skip, limit=limit)
+    # skip keeps the old OFFSET behaviour; otherwise page by id and hand back a cursor
+    if skip:
+        return user_rows.response(user_crud.get_rows(db, columns=user_rows.columns, skip=skip, limit=limit))
+    
+    rows = user_crud.get_rows_after(db, columns=user_rows.columns, after_id=decode_cursor(cursor), limit=limit)
+    headers = {"X-Next-Cursor": encode_cursor(rows[-1][0])} if len(rows) == limit else None
+    return user_rows.response(rows, headers=headers)
 
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(
     user_id: int, 
     user_update: UserUpdate, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    session: SessionClaims = Depends(get_current_session)
 ):
+    if session.user_id != user_id:
+        raise ForbiddenError("Users can only update their own account")
+    
     db_user = user_crud.get(db, id=user_id)
     if not db_user:
         raise NotFoundError("User")
@@ -0,0 +1,44 @@
+"""orjson-backed responses for the routes FastAPI would otherwise encode in Python.
+
+Routes with a response_model are validated and dumped by pydantic-core already,
+so they keep the default response class. These cover the rest: endpoints that
+return plain dicts, and lists read from the database as column tuples, which
+skip building ORM objects and pydantic models altogether.
+"""
+from typing import Any, Iterable, Mapping, Optional, Tuple, Type
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+# Same datetime text as pydantic: aware UTC values end in "Z"
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+class RowSerializer:
+    """Serialize rows holding a schema's fields, in declaration order, as that schema's JSON.
+
+    Values go to orjson unchanged, so the schema's fields must be JSON-ready as
+    stored (ints, strings, datetimes, None); nothing is validated on the way out.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self.columns: Tuple[str, ...] = tuple(schema.model_fields)
+
+    def dumps(self, rows: Iterable[Tuple[Any, ...]]) -> bytes:
+        """A JSON array of objects."""
+        columns = self.columns
+        return orjson.dumps([dict(zip(columns, row)) for row in rows], option=ORJSON_OPTIONS)
+
+    def dumps_lines(self, rows: Iterable[Tuple[Any, ...]]) -> bytes:
+        """Newline-delimited JSON, one object per row."""
+        columns = self.columns
+        option = ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        return b"".join(orjson.dumps(dict(zip(columns, row)), option=option) for row in rows)
+
+    def response(self, rows: Iterable[Tuple[Any, ...]], headers: Optional[Mapping[str, str]] = None) -> Response:
+        return Response(self.dumps(rows), media_type="application/json", headers=headers)
\ No newline at end of file
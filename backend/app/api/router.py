@@ -1,7 +1,9 @@
-from fastapi import APIRouter
-from app.api.endpoints import auth, users
+from fastapi import APIRouter, Depends
+from app.api.endpoints import auth, users, metrics
+from app.api.dependencies import get_current_session
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["Auth"])
-api_router.include_router(users.router, prefix="/users", tags=["Users"])
\ No newline at end of file
+api_router.include_router(users.router, prefix="/users", tags=["Users"], dependencies=[Depends(get_current_session)])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
\ No newline at end of file
@@ -0,0 +1,23 @@
+import base64
+import binascii
+import json
+from typing import Optional
+from app.core.exceptions import ValidationError
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque pagination token for keyset pages ordered by id."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValidationError("Invalid cursor")
+    # bool is an int subclass, and ids are never negative
+    if type(last_id) is not int or last_id < 0:
+        raise ValidationError("Invalid cursor")
+    return last_id
\ No newline at end of file
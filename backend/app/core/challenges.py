@@ -0,0 +1,669 @@
+import asyncio
+import hashlib
+import heapq
+import hmac
+import math
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Engine
+from app.db.models import Challenge
+from app.core.encoding import raw_bytes
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+@dataclass
+class ChallengeStoreStats:
+    issued: int = 0
+    consumed: int = 0
+    misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+    replayed: int = 0
+
+class ChallengeBackend(ABC):
+    """Issues login challenges and redeems each at most once.
+
+    issue() and redeem() are the interface callers use; how a backend keeps
+    track of outstanding challenges is its own business.
+    """
+
+    ttl: float
+    capacity: int
+    # True when calls do I/O and should stay off the event loop
+    blocking: bool = False
+
+    def __init__(self, ttl: float, capacity: int):
+        self.ttl = ttl
+        self.capacity = capacity
+        self._stats = ChallengeStoreStats()
+        self._stats_lock = threading.Lock()
+
+    def _count(self, field: str, n: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self._stats, field, getattr(self._stats, field) + n)
+
+    @abstractmethod
+    def issue(self, pubkey: str) -> str:
+        """Create a challenge for pubkey, valid until it is redeemed or expires."""
+
+    @abstractmethod
+    def redeem(self, pubkey: str, challenge: str, now: Optional[float] = None) -> Optional[str]:
+        """Consume the challenge for pubkey; returns None if it is valid, else why it is not.
+
+        Reasons: no_challenge, challenge_mismatch, expired, replayed, invalid_challenge.
+        """
+
+    @abstractmethod
+    def purge_expired(self, now: Optional[float] = None) -> int: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    def size(self) -> int:
+        """Outstanding challenges, cheap enough to read on the event loop."""
+        return len(self)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(vars(self._stats))
+        stats["size"] = self.size()
+        stats["capacity"] = self.capacity
+        return stats
+
+class StoredChallengeBackend(ChallengeBackend):
+    """A backend that keeps each outstanding challenge, one per pubkey.
+
+    pop() must be an atomic get-and-delete so a challenge can be redeemed at
+    most once, even when several workers share the backend.
+    """
+
+    def issue(self, pubkey: str) -> str:
+        challenge = secrets.token_hex(32)
+        self.put(pubkey, challenge)
+        return challenge
+
+    def redeem(self, pubkey: str, challenge: str, now: Optional[float] = None) -> Optional[str]:
+        entry = self.pop(pubkey)
+        if entry is None:
+            return "no_challenge"
+        stored_challenge, issued_at = entry
+        if challenge != stored_challenge:
+            return "challenge_mismatch"
+        if (time.time() if now is None else now) - issued_at > self.ttl:
+            return "expired"
+        return None
+
+    @abstractmethod
+    def put(self, pubkey: str, challenge: str, issued_at: Optional[float] = None) -> None: ...
+
+    @abstractmethod
+    def pop(self, pubkey: str) -> Optional[Tuple[str, float]]: ...
+
+class _Shard:
+    __slots__ = ("lock", "entries", "heap")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Tuple[str, float]] = {}
+        # (expires_at, pubkey, issued_at); stale rows are skipped lazily
+        self.heap: List[Tuple[float, str, float]] = []
+
+class ChallengeStore(StoredChallengeBackend):
+    """In-process, bounded, TTL-indexed map of pubkey -> (challenge, issued_at).
+
+    Keys are spread over lock-striped shards. Each shard keeps a min-heap on
+    expiry time so purging expired challenges is O(log n) per entry, and a
+    full shard evicts its oldest challenge instead of growing.
+    """
+
+    def __init__(self, ttl: float, capacity: int = 100_000, shards: int = 16):
+        super().__init__(ttl, capacity)
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._shard_capacity = max(1, capacity // len(self._shards))
+
+    def _shard(self, pubkey: str) -> _Shard:
+        return self._shards[hash(pubkey) % len(self._shards)]
+
+    def put(self, pubkey: str, challenge: str, issued_at: Optional[float] = None) -> None:
+        issued_at = time.time() if issued_at is None else issued_at
+        shard = self._shard(pubkey)
+        evicted = 0
+        with shard.lock:
+            if pubkey not in shard.entries:
+                while len(shard.entries) >= self._shard_capacity and self._evict_oldest(shard):
+                    evicted += 1
+            shard.entries[pubkey] = (challenge, issued_at)
+            heapq.heappush(shard.heap, (issued_at + self.ttl, pubkey, issued_at))
+            if len(shard.heap) > 2 * len(shard.entries) + 64:
+                self._compact(shard)
+        self._count("issued")
+        if evicted:
+            self._count("evicted", evicted)
+
+    def pop(self, pubkey: str) -> Optional[Tuple[str, float]]:
+        """Atomically remove and return the challenge for pubkey, if any.
+
+        Entries past their TTL that have not been purged yet are still returned
+        so the caller can report the challenge as expired.
+        """
+        shard = self._shard(pubkey)
+        with shard.lock:
+            entry = shard.entries.pop(pubkey, None)
+        self._count("consumed" if entry else "misses")
+        return entry
+
+    def __contains__(self, pubkey: str) -> bool:
+        shard = self._shard(pubkey)
+        with shard.lock:
+            return pubkey in shard.entries
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        purged = 0
+        for shard in self._shards:
+            with shard.lock:
+                while shard.heap and shard.heap[0][0] <= now:
+                    _, pubkey, issued_at = heapq.heappop(shard.heap)
+                    entry = shard.entries.get(pubkey)
+                    if entry is not None and entry[1] == issued_at:
+                        del shard.entries[pubkey]
+                        purged += 1
+        if purged:
+            self._count("expired", purged)
+        return purged
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.heap.clear()
+
+    @staticmethod
+    def _evict_oldest(shard: _Shard) -> bool:
+        while shard.heap:
+            _, pubkey, issued_at = heapq.heappop(shard.heap)
+            entry = shard.entries.get(pubkey)
+            if entry is not None and entry[1] == issued_at:
+                del shard.entries[pubkey]
+                return True
+        return False
+
+    @staticmethod
+    def _compact(shard: _Shard) -> None:
+        shard.heap = [row for row in shard.heap if shard.entries.get(row[1], (None, None))[1] == row[2]]
+        heapq.heapify(shard.heap)
+
+_EMPTY, _LIVE, _TOMBSTONE = 0, 1, 2
+_FILE_HEADER = struct.Struct("<8sIII16s")   # magic, shards, slots per shard, shard capacity, hash salt
+_FILE_HEADER_SIZE = 64
+_SHARD_HEADER = struct.Struct("<Q")         # live entry count
+_SHARD_HEADER_SIZE = 16
+_SLOT = struct.Struct("<B33s32sd")          # state, pubkey, challenge, issued_at
+_SLOT_SIZE = 80
+_MAGIC = b"FZKCHAL1"
+# A full shard frees this fraction of its capacity per scan, so a login storm pays
+# for one O(slots) scan every shard_capacity / 16 issues rather than on each one
+_EVICT_FRACTION = 16
+
+class MmapChallengeStore(StoredChallengeBackend):
+    """Challenge store in a memory-mapped file, shared by all workers on one host.
+
+    The file holds one open-addressing hash table per shard. Each shard is
+    guarded by a POSIX byte-range lock (plus a thread lock, since record locks
+    are per-process), so pop() is an atomic get-and-delete across processes.
+    Pubkeys and challenges are stored as raw bytes, 33 and 32 bytes long.
+
+    The file name carries the table geometry (e.g. challenges.16x16384.bin), so
+    workers started with different settings never share a file. A file that is
+    already in use is never resized: one that does not match is an error.
+    """
+
+    def __init__(self, path: str, ttl: float, capacity: int = 100_000, shards: int = 16):
+        if fcntl is None:
+            raise RuntimeError("MmapChallengeStore requires fcntl (POSIX only)")
+        super().__init__(ttl, capacity)
+        self._n_shards = max(1, shards)
+        self._shard_capacity = max(1, capacity // self._n_shards)
+        self._slots = 1 << (2 * self._shard_capacity - 1).bit_length()  # load factor <= 0.5
+        self._shard_size = _SHARD_HEADER_SIZE + self._slots * _SLOT_SIZE
+        size = _FILE_HEADER_SIZE + self._n_shards * self._shard_size
+        root, ext = os.path.splitext(path)
+        self.path = path = f"{root}.{self._n_shards}x{self._slots}{ext}"
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            geometry = (self._n_shards, self._slots, self._shard_capacity)
+            if os.fstat(self._fd).st_size == 0:
+                # Fresh file; the flock keeps other workers out until the header is written
+                logger.info(f"Initializing shared challenge store at {path}")
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _FILE_HEADER.pack(_MAGIC, *geometry, secrets.token_bytes(16)), 0)
+            header = os.pread(self._fd, _FILE_HEADER.size, 0)
+            valid = (os.fstat(self._fd).st_size == size and len(header) == _FILE_HEADER.size
+                     and _FILE_HEADER.unpack(header)[0] == _MAGIC
+                     and _FILE_HEADER.unpack(header)[1:4] == geometry)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if not valid:
+            os.close(self._fd)
+            raise RuntimeError(f"Challenge store file {path} does not match its geometry; "
+                               "remove it once no worker is using it")
+        self._salt = _FILE_HEADER.unpack(header)[4]
+
+        self._mm = mmap.mmap(self._fd, size)
+        self._thread_locks = [threading.Lock() for _ in range(self._n_shards)]
+
+    @contextmanager
+    def _locked(self, shard: int) -> Iterator[None]:
+        with self._thread_locks[shard]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, shard)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, shard)
+
+    def _locate(self, key: bytes) -> Tuple[int, int]:
+        h = int.from_bytes(hashlib.blake2b(key, digest_size=8, key=self._salt).digest(), "little")
+        return h % self._n_shards, (h // self._n_shards) & (self._slots - 1)
+
+    def _shard_offset(self, shard: int) -> int:
+        return _FILE_HEADER_SIZE + shard * self._shard_size
+
+    def _slot_offset(self, shard: int, index: int) -> int:
+        return self._shard_offset(shard) + _SHARD_HEADER_SIZE + index * _SLOT_SIZE
+
+    def _live_count(self, shard: int) -> int:
+        return _SHARD_HEADER.unpack_from(self._mm, self._shard_offset(shard))[0]
+
+    def _add_live(self, shard: int, delta: int) -> None:
+        _SHARD_HEADER.pack_into(self._mm, self._shard_offset(shard), self._live_count(shard) + delta)
+
+    def _find(self, shard: int, start: int, key: bytes) -> Tuple[Optional[int], Optional[int]]:
+        """Return (index of key, first reusable slot on its probe path)."""
+        free = None
+        index = start
+        for _ in range(self._slots):
+            state, pubkey, _, _ = _SLOT.unpack_from(self._mm, self._slot_offset(shard, index))
+            if state == _EMPTY:
+                return None, index if free is None else free
+            if state == _TOMBSTONE:
+                if free is None:
+                    free = index
+            elif pubkey == key:
+                return index, free
+            index = (index + 1) & (self._slots - 1)
+        return None, free
+
+    def _evict_oldest(self, shard: int, count: int) -> int:
+        """Tombstone the count oldest live entries of shard in one scan; returns how many went."""
+        live = []
+        for index in range(self._slots):
+            state, _, _, issued_at = _SLOT.unpack_from(self._mm, self._slot_offset(shard, index))
+            if state == _LIVE:
+                live.append((issued_at, index))
+        oldest = heapq.nsmallest(count, live)
+        for _, index in oldest:
+            self._mm[self._slot_offset(shard, index)] = _TOMBSTONE
+        self._add_live(shard, -len(oldest))
+        return len(oldest)
+
+    def _rebuild(self, shard: int) -> None:
+        live = []
+        for index in range(self._slots):
+            row = _SLOT.unpack_from(self._mm, self._slot_offset(shard, index))
+            if row[0] == _LIVE:
+                live.append(row)
+        start = self._slot_offset(shard, 0)
+        self._mm[start:start + self._slots * _SLOT_SIZE] = bytes(self._slots * _SLOT_SIZE)
+        for row in live:
+            _, index = self._locate(row[1])
+            while self._mm[self._slot_offset(shard, index)] != _EMPTY:
+                index = (index + 1) & (self._slots - 1)
+            _SLOT.pack_into(self._mm, self._slot_offset(shard, index), *row)
+
+    def put(self, pubkey: str, challenge: str, issued_at: Optional[float] = None) -> None:
+        issued_at = time.time() if issued_at is None else issued_at
+        key, value = raw_bytes(pubkey), raw_bytes(challenge)
+        if len(key) != 33 or len(value) != 32:
+            raise ValueError("Expected a 33-byte compressed pubkey and a 32-byte challenge")
+
+        shard, start = self._locate(key)
+        evicted = 0
+        with self._locked(shard):
+            index, free = self._find(shard, start, key)
+            if index is None:
+                if self._live_count(shard) >= self._shard_capacity:
+                    evicted = self._evict_oldest(shard, max(1, self._shard_capacity // _EVICT_FRACTION))
+                    # Clear the new tombstones too, so probe paths stay short until the next batch
+                    self._rebuild(shard)
+                    index, free = self._find(shard, start, key)
+                if free is None:
+                    self._rebuild(shard)
+                    index, free = self._find(shard, start, key)
+                index = free
+                self._add_live(shard, 1)
+            _SLOT.pack_into(self._mm, self._slot_offset(shard, index), _LIVE, key, value, issued_at)
+        self._count("issued")
+        if evicted:
+            self._count("evicted", evicted)
+
+    def pop(self, pubkey: str) -> Optional[Tuple[str, float]]:
+        try:
+            key = raw_bytes(pubkey)
+        except ValueError:
+            self._count("misses")
+            return None
+
+        shard, start = self._locate(key)
+        with self._locked(shard):
+            index, _ = self._find(shard, start, key)
+            if index is None:
+                entry = None
+            else:
+                offset = self._slot_offset(shard, index)
+                _, _, value, issued_at = _SLOT.unpack_from(self._mm, offset)
+                self._mm[offset] = _TOMBSTONE
+                self._add_live(shard, -1)
+                entry = (value.hex(), issued_at)
+        self._count("consumed" if entry else "misses")
+        return entry
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        cutoff = (time.time() if now is None else now) - self.ttl
+        purged = 0
+        for shard in range(self._n_shards):
+            with self._locked(shard):
+                tombstones = 0
+                for index in range(self._slots):
+                    offset = self._slot_offset(shard, index)
+                    state, _, _, issued_at = _SLOT.unpack_from(self._mm, offset)
+                    if state == _LIVE and issued_at <= cutoff:
+                        self._mm[offset] = _TOMBSTONE
+                        self._add_live(shard, -1)
+                        purged += 1
+                        state = _TOMBSTONE
+                    tombstones += state == _TOMBSTONE
+                if tombstones > self._slots // 4:
+                    self._rebuild(shard)
+        if purged:
+            self._count("expired", purged)
+        return purged
+
+    def __len__(self) -> int:
+        return sum(self._live_count(shard) for shard in range(self._n_shards))
+
+    def clear(self) -> None:
+        for shard in range(self._n_shards):
+            with self._locked(shard):
+                start = self._shard_offset(shard)
+                self._mm[start:start + self._shard_size] = bytes(self._shard_size)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+class SQLChallengeStore(StoredChallengeBackend):
+    """Challenge store in the auth_challenge table, shared by every worker using the database.
+
+    pop() is a single DELETE ... RETURNING, so the row is consumed atomically.
+    Capacity is enforced during purge_expired() by dropping the oldest rows,
+    and size() reports the row count that sweep saw instead of counting again.
+    """
+
+    blocking = True
+
+    def __init__(self, engine: Engine, ttl: float, capacity: int = 100_000):
+        super().__init__(ttl, capacity)
+        self.engine = engine
+        self._table = Challenge.__table__
+        self._size = 0
+        if engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        elif engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            upsert = None
+        self._upsert = upsert
+
+    def put(self, pubkey: str, challenge: str, issued_at: Optional[float] = None) -> None:
+        values = {"pubkey": pubkey, "challenge": challenge,
+                  "issued_at": time.time() if issued_at is None else issued_at}
+        with self.engine.begin() as conn:
+            if self._upsert is not None:
+                stmt = self._upsert(self._table).values(**values)
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[self._table.c.pubkey],
+                    set_={"challenge": stmt.excluded.challenge, "issued_at": stmt.excluded.issued_at}
+                ))
+            else:
+                conn.execute(delete(self._table).where(self._table.c.pubkey == pubkey))
+                conn.execute(insert(self._table).values(**values))
+        self._count("issued")
+
+    def pop(self, pubkey: str) -> Optional[Tuple[str, float]]:
+        table = self._table
+        with self.engine.begin() as conn:
+            if self.engine.dialect.delete_returning:
+                row = conn.execute(
+                    delete(table).where(table.c.pubkey == pubkey).returning(table.c.challenge, table.c.issued_at)
+                ).first()
+            else:
+                row = conn.execute(
+                    select(table.c.challenge, table.c.issued_at).where(table.c.pubkey == pubkey).with_for_update()
+                ).first()
+                if row is not None:
+                    conn.execute(delete(table).where(table.c.pubkey == pubkey))
+        self._count("consumed" if row else "misses")
+        return (row.challenge, row.issued_at) if row else None
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        table = self._table
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self.engine.begin() as conn:
+            purged = conn.execute(delete(table).where(table.c.issued_at <= cutoff)).rowcount or 0
+            size = conn.execute(select(func.count()).select_from(table)).scalar_one()
+            excess = size - self.capacity
+            if excess > 0:
+                oldest = select(table.c.pubkey).order_by(table.c.issued_at).limit(excess).scalar_subquery()
+                evicted = conn.execute(delete(table).where(table.c.pubkey.in_(oldest))).rowcount or 0
+                self._count("evicted", evicted)
+                size -= evicted
+        self._size = size
+        if purged:
+            self._count("expired", purged)
+        return purged
+
+    def __len__(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self._table)).scalar_one()
+
+    def size(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self._table))
+        self._size = 0
+
+class ReplayFilter:
+    """Two generations of Bloom filters, each covering one TTL.
+
+    An entry added in the current generation survives one rotation, so it is
+    remembered for at least ttl seconds. Callers supply uniformly distributed
+    keys (an HMAC or a random id), so the bit positions are taken straight
+    from the key.
+    """
+
+    def __init__(self, ttl: float, capacity: int, false_positive_rate: float):
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self.bits = max(64, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self._lock = threading.Lock()
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._entries = 0
+        self._rotated_at = time.time()
+
+    def _positions(self, key: bytes) -> List[int]:
+        h1 = int.from_bytes(key[:8], "big")
+        h2 = int.from_bytes(key[8:16], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def rotate_if_due(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self._rotated_at >= self.ttl:
+                self._previous = self._current if now - self._rotated_at < 2 * self.ttl else bytearray(len(self._current))
+                self._current = bytearray(len(self._current))
+                self._entries = 0
+                self._rotated_at = now
+
+    def add_if_absent(self, key: bytes) -> bool:
+        """Add key; False if it (probably) was already present."""
+        positions = self._positions(key)
+        with self._lock:
+            current, previous = self._current, self._previous
+            if all(current[p >> 3] & (1 << (p & 7)) for p in positions) or \
+                    all(previous[p >> 3] & (1 << (p & 7)) for p in positions):
+                return False
+            for p in positions:
+                current[p >> 3] |= 1 << (p & 7)
+            self._entries += 1
+        if self._entries == self.capacity:
+            logger.warning(f"Replay filter reached its capacity of {self.capacity}; false positives will rise until it rotates")
+        return True
+
+    def __contains__(self, key: bytes) -> bool:
+        # Positions are generated lazily: a key that is absent usually fails on the first bit or two
+        h1 = int.from_bytes(key[:8], "big")
+        h2 = int.from_bytes(key[8:16], "big") | 1
+        for bitmap in (self._current, self._previous):
+            for i in range(self.hashes):
+                p = (h1 + i * h2) % self.bits
+                if not bitmap[p >> 3] & (1 << (p & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._current = bytearray(len(self._current))
+            self._previous = bytearray(len(self._current))
+            self._entries = 0
+
+    def __len__(self) -> int:
+        return self._entries
+
+class StatelessChallengeStore(ChallengeBackend):
+    """Signed challenges that need no per-challenge server state.
+
+    A challenge is nonce (16 bytes) || expiry (8 bytes, unix seconds) ||
+    HMAC-SHA256(key, pubkey || nonce || expiry), so any instance holding the
+    key can check it. Redeemed challenges are remembered in a replay filter
+    for one TTL; that filter is per process, so with several workers or
+    instances a challenge can still be redeemed once on each of them before it
+    expires. Use the sql backend where that matters.
+    """
+
+    NONCE_SIZE = 16
+
+    def __init__(self, key: bytes, ttl: float, capacity: int = 100_000, false_positive_rate: float = 1e-6):
+        super().__init__(ttl, capacity)
+        self._key = key
+        self._replays = ReplayFilter(ttl, capacity, false_positive_rate)
+
+    def _mac(self, pubkey: str, nonce: bytes, expiry: bytes) -> bytes:
+        return hmac.new(self._key, pubkey.lower().encode() + nonce + expiry, hashlib.sha256).digest()
+
+    def issue(self, pubkey: str) -> str:
+        nonce = secrets.token_bytes(self.NONCE_SIZE)
+        expiry = struct.pack(">Q", int(time.time() + self.ttl))
+        self._count("issued")
+        return (nonce + expiry + self._mac(pubkey, nonce, expiry)).hex()
+
+    def redeem(self, pubkey: str, challenge: str, now: Optional[float] = None) -> Optional[str]:
+        self._replays.rotate_if_due(now)
+        try:
+            raw = raw_bytes(challenge)
+        except ValueError:
+            raw = b""
+        if len(raw) != self.NONCE_SIZE + 8 + hashlib.sha256().digest_size:
+            self._count("misses")
+            return "invalid_challenge"
+
+        nonce, expiry, mac = raw[:self.NONCE_SIZE], raw[self.NONCE_SIZE:self.NONCE_SIZE + 8], raw[self.NONCE_SIZE + 8:]
+        if not hmac.compare_digest(mac, self._mac(pubkey, nonce, expiry)):
+            self._count("misses")
+            return "invalid_challenge"
+        if (time.time() if now is None else now) > struct.unpack(">Q", expiry)[0]:
+            self._count("expired")
+            return "expired"
+        if not self._replays.add_if_absent(mac):
+            self._count("replayed")
+            return "replayed"
+        self._count("consumed")
+        return None
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        self._replays.rotate_if_due(now)
+        return 0
+
+    def __len__(self) -> int:
+        return 0
+
+    def clear(self) -> None:
+        self._replays.clear()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats["replay_filter_entries"] = len(self._replays)
+        stats["replay_filter_bytes"] = 2 * ((self._replays.bits + 7) // 8)
+        return stats
+
+def create_challenge_store(backend: str, ttl: float, capacity: int, shards: int, mmap_path: str,
+                           secret: Optional[str] = None) -> ChallengeBackend:
+    if backend == "memory":
+        return ChallengeStore(ttl=ttl, capacity=capacity, shards=shards)
+    if backend == "mmap":
+        return MmapChallengeStore(mmap_path, ttl=ttl, capacity=capacity, shards=shards)
+    if backend == "sql":
+        from app.db.session import engine
+        return SQLChallengeStore(engine, ttl=ttl, capacity=capacity)
+    if backend == "stateless":
+        if not secret:
+            raise RuntimeError("CHALLENGE_SECRET must be set for the stateless challenge backend")
+        return StatelessChallengeStore(secret.encode(), ttl=ttl, capacity=capacity)
+    raise ValueError(f"Unknown challenge backend: {backend!r}")
+
+async def run_expiry_loop(store: ChallengeBackend, interval: float) -> None:
+    """Periodically drop expired challenges; run as a background task for the app's lifetime."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            purged = await asyncio.to_thread(store.purge_expired)
+            if purged:
+                logger.debug(f"Purged {purged} expired challenges, {store.size()} remaining")
+        except Exception as e:
+            logger.error(f"Challenge expiry sweep failed: {e}")
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
-from typing import List
+import tempfile
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -9,11 +10,103 @@ class Settings(BaseSettings):
     APP_NAME: str = "ZKP Auth API"
     API_PREFIX: str = "/api"
     DEBUG: bool = True
+    # Worker processes; uvicorn and gunicorn read this as the default for --workers
+    WEB_CONCURRENCY: int = 1
 
     
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Defaults to DATABASE_URL with the asyncpg / aiosqlite driver swapped in
+    ASYNC_DATABASE_URL: Optional[str] = None
+    SQL_ECHO: bool = False
+
+    # Per engine, and each worker process has a sync and an async engine
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # Postgres only; 0 leaves the server default
+    # Migration DDL gives up instead of queueing behind (and blocking) live queries
+    MIGRATION_LOCK_TIMEOUT_MS: int = 5000
+    MIGRATION_BATCH_SIZE: int = 5000
     
     CHALLENGE_TTL: int = 300  
+    CHALLENGE_BACKEND: str = "memory"  # memory | mmap | sql | stateless
+    # HMAC key for stateless challenges, required by that backend and the same on
+    # every instance. Replay protection is per process: a stateless challenge can
+    # be redeemed once on each worker until it expires; use sql to share it
+    CHALLENGE_SECRET: Optional[str] = None
+    # The shard/slot geometry is added to the file name, e.g. fizk_challenges.16x16384.bin
+    CHALLENGE_MMAP_PATH: str = os.path.join(tempfile.gettempdir(), "fizk_challenges.bin")
+    CHALLENGE_STORE_CAPACITY: int = 100_000
+    CHALLENGE_STORE_SHARDS: int = 16
+    CHALLENGE_PURGE_INTERVAL: float = 30.0
+
+    # HMAC key for session tokens; must be the same on every instance. Required
+    # unless DEBUG is on and the app runs a single worker
+    SESSION_SECRET: Optional[str] = None
+    SESSION_TTL: int = 900
+    # Revoked tokens are kept in a Bloom filter sized for this many per TTL
+    SESSION_REVOCATION_CAPACITY: int = 100_000
+
+    # Rely on the unique indexes on User instead of checking for conflicts before inserting
+    SIGNUP_INSERT_FIRST: bool = True
+    # Bulk signup: rows per uniqueness query + INSERT round, and rows per API request
+    BULK_SIGNUP_CHUNK_SIZE: int = 1000
+    BULK_SIGNUP_MAX_ITEMS: int = 10_000
+    # Sent as X-Admin-Token to POST /auth/signup/bulk, /api/metrics and /metrics; those are disabled while unset
+    ADMIN_API_TOKEN: Optional[str] = None
+
+    # Read-through cache of users by pubkey/username/email; 0 disables it
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 60.0
+
+    USERS_EXPORT_BATCH_SIZE: int = 1000
+
+    # Recovery phrases generated ahead of /signup-mnemonics; refilled below the watermark
+    MNEMONIC_POOL_SIZE: int = 300
+    MNEMONIC_POOL_LOW_WATERMARK: int = 100
+
+    # Token buckets (rate per second, burst) on auth endpoints; the pubkey one covers /challenge and /login.
+    # The per-IP default holds one address to about 10 logins a second (each is a challenge plus a
+    # login request) after a burst of 50. Raise it for clients behind a shared NAT address, and for
+    # load tests, which send everything from one address.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_RATE: float = 20.0
+    RATE_LIMIT_IP_BURST: int = 100
+    RATE_LIMIT_PUBKEY_RATE: float = 0.5
+    RATE_LIMIT_PUBKEY_BURST: int = 10
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # Larger /challenge and /login bodies get 413 before the pubkey is looked for
+    RATE_LIMIT_MAX_BODY_BYTES: int = 4096
+    # Login requests get 503 + Retry-After beyond this many in flight, or while the
+    # verify executor is backed up and its recent latency is over the threshold
+    LOAD_SHED_MAX_IN_FLIGHT: int = 512
+    LOAD_SHED_LATENCY_MS: float = 250.0
+
+    LOGIN_BATCH_MAX_SIZE: int = 64
+    LOGIN_BATCH_MAX_DELAY_MS: float = 2.0
+    LOGIN_BATCH_MAX_ITEMS: int = 256
+    # Check a login batch with one random linear combination and fall back to per-proof
+    # checks only when it fails; off, every proof gets its own combined multiplication.
+    # Opt-in until benchmarks.verification shows it beating combined_batch on the target
+    LOGIN_BATCH_LINEAR_COMBINATION: bool = False
+
+    # Decoded public key points kept for returning users; 0 disables the cache
+    PUBKEY_CACHE_SIZE: int = 50_000
+    # Precomputed multiples per key for the pure-Python verifier (about 1 KB each)
+    PUBKEY_TABLE_CACHE_SIZE: int = 4096
+
+    DB_EXECUTOR_WORKERS: int = 16
+    VERIFY_EXECUTOR_KIND: str = "process"  # process | thread
+    VERIFY_EXECUTOR_WORKERS: int = 2
+    
+    # Same as the original file sink; raise to INFO to keep per-login debug lines off the queue
+    LOG_FILE_LEVEL: str = "DEBUG"
+    LOG_CONSOLE_LEVEL: str = "INFO"
+    LOG_ENQUEUE: bool = True
+    # Fraction of successful requests to access-log, per path; failures are always logged
+    LOG_SAMPLE_DEFAULT: float = 1.0
+    LOG_SAMPLE_RATES: Dict[str, float] = {"/api/auth/challenge": 0.1, "/api/auth/login": 0.1}
     
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
@@ -23,4 +116,4 @@ class Settings(BaseSettings):
         "extra": "ignore"  
     }
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
\ No newline at end of file
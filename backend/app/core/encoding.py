@@ -0,0 +1,60 @@
+"""Fixed-size binary request fields, sent as hex or base64 and decoded once."""
+import base64
+import binascii
+from typing import Callable, Collection
+
+class HexBytes(str):
+    """A validated hex string that also carries its decoded bytes.
+
+    Behaves as the hex string everywhere (DB columns, challenge store keys,
+    logs); code that needs the bytes reads .raw instead of calling fromhex again.
+    """
+
+    raw: bytes
+
+def _hex_bytes(value: str, raw: bytes) -> HexBytes:
+    # Cheaper than overriding __new__, which costs a Python-level super() call per field
+    wrapped = HexBytes(value)
+    wrapped.raw = raw
+    return wrapped
+
+def raw_bytes(value: str) -> bytes:
+    if isinstance(value, HexBytes):
+        return value.raw
+    return bytes.fromhex(value)
+
+def _base64_length(size: int) -> int:
+    return (size + 2) // 3 * 4
+
+def binary_decoder(sizes: Collection[int]) -> Callable[[str], HexBytes]:
+    """Decoder for a field of one of the given byte sizes, written as hex or (padded, standard or URL-safe) base64.
+
+    The two encodings never have the same length for these sizes, so the
+    length picks the decoder. Either way the string is lowercase hex, so one key has
+    one spelling in the users table, the user cache and the challenge store.
+    """
+    sizes = frozenset(sizes)
+    hex_lengths = frozenset(2 * size for size in sizes)
+    base64_lengths = frozenset(_base64_length(size) for size in sizes)
+    error = f"Expected {' or '.join(str(size) for size in sorted(sizes))} bytes as hex or base64"
+
+    def decode(value: str) -> HexBytes:
+        length = len(value)
+        if length in hex_lengths:
+            try:
+                raw = bytes.fromhex(value)
+            except ValueError:
+                raw = b""
+            # fromhex skips whitespace, which would leave fewer bytes than the length implies
+            if 2 * len(raw) == length:
+                return _hex_bytes(raw.hex(), raw)
+        elif length in base64_lengths:
+            try:
+                raw = base64.b64decode(value.replace("-", "+").replace("_", "/"), validate=True)
+            except binascii.Error:
+                raw = b""
+            if len(raw) in sizes:
+                return _hex_bytes(raw.hex(), raw)
+        raise ValueError(error)
+
+    return decode
\ No newline at end of file
@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, TypeVar
+from loguru import logger
+from app.core.config import settings
+
+T = TypeVar("T")
+
+LATENCY_SMOOTHING = 0.2
+
+class InstrumentedExecutor:
+    """A bounded pool that event-loop code awaits, with queue-depth and latency counters.
+
+    The underlying executor is created on first use so importing the module
+    does not fork worker processes. If a worker process dies, the broken pool is
+    dropped and the call is retried once on a fresh one.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Executor], max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.max_queue_depth = 0
+        self.total_seconds = 0.0
+        # Exponentially weighted latency (queue wait + run time) of recent calls
+        self.recent_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            logger.info(f"Starting {self.name} executor with {self.max_workers} workers")
+            self._executor = self._factory()
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        call, call_args = (functools.partial(fn, *args, **kwargs), ()) if kwargs else (fn, args)
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        start = time.perf_counter()
+        try:
+            executor = self.executor
+            try:
+                result = await loop.run_in_executor(executor, call, *call_args)
+            except BrokenProcessPool:
+                self._replace_broken(executor)
+                result = await loop.run_in_executor(self.executor, call, *call_args)
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            self.total_seconds += elapsed
+            self.recent_seconds += LATENCY_SMOOTHING * (elapsed - self.recent_seconds)
+
+    def _replace_broken(self, executor: Executor) -> None:
+        # Every call queued on the broken pool lands here; only the first replaces it
+        if self._executor is executor:
+            logger.error(f"{self.name} executor lost a worker process; starting a new pool")
+            self.restarts += 1
+            self.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "max_workers": self.max_workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_ms": round(self.total_seconds / finished * 1000, 3) if finished else 0.0,
+            "recent_ms": round(self.recent_seconds * 1000, 3),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def _verify_executor_factory() -> Executor:
+    if settings.VERIFY_EXECUTOR_KIND == "process":
+        # The pool starts lazily, when loguru, DB pool and other threads are already
+        # running; forking then could copy a held lock into a child, so never fork
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(max_workers=settings.VERIFY_EXECUTOR_WORKERS,
+                                   mp_context=multiprocessing.get_context(method))
+    return ThreadPoolExecutor(max_workers=settings.VERIFY_EXECUTOR_WORKERS, thread_name_prefix="verify")
+
+db_executor = InstrumentedExecutor(
+    "db",
+    lambda: ThreadPoolExecutor(max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix="db"),
+    settings.DB_EXECUTOR_WORKERS
+)
+verify_executor = InstrumentedExecutor("verify", _verify_executor_factory, settings.VERIFY_EXECUTOR_WORKERS)
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await db_executor.run(fn, *args, **kwargs)
+
+async def run_verify(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await verify_executor.run(fn, *args, **kwargs)
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {"db": db_executor.stats(), "verify": verify_executor.stats()}
+
+def shutdown_executors() -> None:
+    db_executor.shutdown()
+    verify_executor.shutdown()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import itertools
+import random
+import time
+from typing import Dict, Optional
+from loguru import logger
+from app.core.config import settings
+
+def setup_logging() -> None:
+    """Install the application's loguru sinks.
+
+    Sinks are enqueued, so request handlers only pay for putting a record on
+    a queue while a background thread does formatting and I/O. loguru's
+    default stderr handler is removed so each record is written once.
+    """
+    logger.remove()
+    logger.add(
+        "logs/backend_{time:YYYY-MM-DD}.log", rotation="1 day", retention="7 days",
+        level=settings.LOG_FILE_LEVEL, enqueue=settings.LOG_ENQUEUE,
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level:<8} | {name}:{function}:{line} - {message}"
+    )
+    logger.add(
+        lambda msg: print(msg, end=""), level=settings.LOG_CONSOLE_LEVEL, enqueue=settings.LOG_ENQUEUE,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level:<8}</level> | <cyan>{message}</cyan>",
+        colorize=True
+    )
+
+class RequestLoggingMiddleware:
+    """Pure ASGI access log with per-route sampling.
+
+    Writes one line per sampled request after the response starts. Requests
+    that fail (status >= 400 or an exception) are always logged. Request ids
+    come from a counter and are only formatted when a line is emitted.
+    """
+
+    def __init__(self, app, sample_rates: Optional[Dict[str, float]] = None, default_rate: float = 1.0):
+        self.app = app
+        self.sample_rates = sample_rates or {}
+        self.default_rate = default_rate
+        self._ids = itertools.count(1)
+
+    def _sampled(self, path: str) -> bool:
+        rate = self.sample_rates.get(path, self.default_rate)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = next(self._ids)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            logger.error("RID {:x} !!! {} {} - Unhandled Error: {}", request_id, scope["method"], scope["path"], e)
+            raise
+
+        if status_code >= 400 or self._sampled(scope["path"]):
+            client = scope.get("client")
+            logger.info(
+                "RID {:x} {} {} from {} - Status: {} ({:.2f}ms)",
+                request_id, scope["method"], scope["path"], client[0] if client else "unknown",
+                status_code, (time.perf_counter() - start) * 1000
+            )
\ No newline at end of file
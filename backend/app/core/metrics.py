@@ -0,0 +1,229 @@
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class _ThreadCells:
+    """Per-thread accumulators: each thread only ever writes its own cell, so updates need no lock.
+
+    A lock is taken once per thread, when its cell is first created.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = [0] * self.width
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+        return cell
+
+    def totals(self) -> List[float]:
+        totals = [0] * self.width
+        for cell in list(self._cells):
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines; subclasses append their samples to these HELP and TYPE lines."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class _LabeledMetric(_Metric):
+    """A metric with one child series per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation)
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_LabeledMetric"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **kwargs: str):
+        key = tuple(str(v) for v in values) if values else tuple(str(kwargs[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> "_LabeledMetric":
+        """An unlabeled metric of the same kind, holding one series."""
+
+    def _series(self) -> Iterator[Tuple[Tuple[str, ...], "_LabeledMetric"]]:
+        if self.labelnames:
+            yield from list(self._children.items())
+        else:
+            yield (), self
+
+    def _label_str(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{n}="{v}"' for n, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter(_LabeledMetric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._cells = _ThreadCells(1)
+
+    def _new_child(self):
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1) -> None:
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, series in self._series():
+            lines.append(f"{self.name}{self._label_str(values)} {series.value}")
+        return lines
+
+class Gauge(_Metric):
+    """A gauge whose value is read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation)
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is None:
+            return []
+        return super().render() + [f"{self.name} {self._function()}"]
+
+class Histogram(_LabeledMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket, then +Inf, sum and count
+        self._cells = _ThreadCells(len(self.buckets) + 3)
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.cell()
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cell[i] += 1
+                break
+        else:
+            cell[len(self.buckets)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, series in self._series():
+            totals = series._cells.totals()
+            cumulative = 0
+            for bound, count in zip(series.buckets + (float("inf"),), totals):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = self._label_str(values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_str(values)} {totals[-2]}")
+            lines.append(f"{self.name}_count{self._label_str(values)} {totals[-1]}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def timed(histogram: Histogram, label: str):
+    """Decorator observing the wall time of a sync or async function under histogram.labels(label)."""
+    child = histogram.labels(label)
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+CHALLENGES_ISSUED = REGISTRY.register(Counter(
+    "fizk_challenges_issued_total", "Login challenges issued"))
+CHALLENGE_STORE_SIZE = REGISTRY.register(Gauge(
+    "fizk_challenge_store_size", "Outstanding challenges in the challenge store"))
+VERIFY_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "fizk_verify_stage_seconds", "Schnorr verification time by stage (decode, hash, ec)", ("stage",)))
+VERIFY_REJECTIONS = REGISTRY.register(Counter(
+    "fizk_verify_rejections_total", "Rejected login proofs by reason", ("reason",)))
+SESSIONS_ISSUED = REGISTRY.register(Counter(
+    "fizk_sessions_issued_total", "Session tokens issued after a successful login"))
+SESSION_REJECTIONS = REGISTRY.register(Counter(
+    "fizk_session_rejections_total", "Rejected session tokens by reason", ("reason",)))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "fizk_rate_limited_total", "Requests refused with 429, by limiter", ("limiter",)))
+LOAD_SHED = REGISTRY.register(Counter(
+    "fizk_load_shed_total", "Verification requests refused with 503, by reason", ("reason",)))
+VERIFY_IN_FLIGHT = REGISTRY.register(Gauge(
+    "fizk_verify_requests_in_flight", "Login requests admitted by the load shedder and not yet answered"))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "fizk_db_query_seconds", "Latency of CRUDUser methods, including cache hits", ("method",)))
\ No newline at end of file
@@ -0,0 +1,234 @@
+import json
+import math
+import threading
+import time
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+from loguru import logger
+from app.core.config import settings
+from app.core.encoding import binary_decoder
+from app.core.executors import InstrumentedExecutor, verify_executor
+from app.core.metrics import RATE_LIMITED, LOAD_SHED, VERIFY_IN_FLIGHT
+
+class TokenBucketLimiter:
+    """Token buckets stored as one float per key (GCRA).
+
+    Instead of (tokens, last refill) each key keeps its theoretical arrival
+    time: the moment its bucket would be full again. A request is allowed while
+    that lies at most burst - 1 intervals ahead, and pushes it one interval
+    further. This gives the same sliding-window behaviour as a token bucket
+    with half the state and no refill arithmetic. Keys whose bucket has
+    refilled carry no information and are dropped when the table reaches max_keys.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._interval = 1.0 / rate
+        self._tolerance = self._interval * (burst - 1)
+        self._arrivals: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def acquire(self, key: Hashable, now: Optional[float] = None) -> float:
+        """0.0 if the request may go ahead, otherwise seconds until it would be allowed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            arrival = self._arrivals.get(key, now)
+            if arrival < now:
+                arrival = now
+            wait = arrival - now - self._tolerance
+            if wait > 0:
+                self.limited += 1
+                return wait
+            if len(self._arrivals) >= self.max_keys and key not in self._arrivals:
+                self._prune(now)
+            self._arrivals[key] = arrival + self._interval
+            self.allowed += 1
+            return 0.0
+
+    def _prune(self, now: float) -> None:
+        self._arrivals = {key: arrival for key, arrival in self._arrivals.items() if arrival > now}
+        if len(self._arrivals) >= self.max_keys:
+            # Every bucket is in use: forget the oldest quarter, which hands them a full bucket again
+            logger.warning(f"Rate limiter table full ({self.max_keys} keys); evicting the oldest entries")
+            keep = list(self._arrivals.items())[self.max_keys // 4:]
+            self._arrivals = dict(keep)
+
+    def __len__(self) -> int:
+        return len(self._arrivals)
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "keys": len(self._arrivals),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+class LoadShedder:
+    """Caps concurrent login requests and refuses new ones while verification is backed up.
+
+    Queue latency is the verify executor's recent (smoothed) latency. It only
+    counts while the executor has work in flight, so shedding stops as soon as
+    the backlog drains instead of waiting for the average to decay.
+    """
+
+    def __init__(self, max_in_flight: int, latency_threshold: float, executor: InstrumentedExecutor = verify_executor):
+        self.max_in_flight = max_in_flight
+        self.latency_threshold = latency_threshold
+        self.executor = executor
+        self.in_flight = 0
+        self.shed = 0
+
+    def try_acquire(self) -> Tuple[Optional[str], float]:
+        """(None, 0) and a slot to release(), or the reason for refusing and a Retry-After in seconds."""
+        if self.in_flight >= self.max_in_flight:
+            return self._refuse("concurrency", 1.0)
+        latency = self.executor.recent_seconds
+        if latency > self.latency_threshold and self.executor.in_flight:
+            return self._refuse("queue_latency", latency)
+        self.in_flight += 1
+        return None, 0.0
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def _refuse(self, reason: str, retry_after: float) -> Tuple[str, float]:
+        self.shed += 1
+        LOAD_SHED.labels(reason).inc()
+        return reason, retry_after
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "latency_threshold_ms": self.latency_threshold * 1000,
+            "verify_recent_ms": round(self.executor.recent_seconds * 1000, 3),
+            "shed": self.shed,
+        }
+
+ip_limiter = TokenBucketLimiter(settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_MAX_KEYS)
+pubkey_limiter = TokenBucketLimiter(settings.RATE_LIMIT_PUBKEY_RATE, settings.RATE_LIMIT_PUBKEY_BURST, settings.RATE_LIMIT_MAX_KEYS)
+load_shedder = LoadShedder(settings.LOAD_SHED_MAX_IN_FLIGHT, settings.LOAD_SHED_LATENCY_MS / 1000)
+VERIFY_IN_FLIGHT.set_function(lambda: load_shedder.in_flight)
+
+def rate_limit_stats() -> dict:
+    return {"ip": ip_limiter.stats(), "pubkey": pubkey_limiter.stats(), "load_shedder": load_shedder.stats()}
+
+_auth = f"{settings.API_PREFIX}/auth"
+IP_LIMITED_PATHS = frozenset(f"{_auth}/{p}" for p in ("challenge", "login", "login/batch", "signup", "signup/bulk", "resolve-user"))
+PUBKEY_LIMITED_PATHS = frozenset(f"{_auth}/{p}" for p in ("challenge", "login"))
+SHED_PATHS = frozenset(f"{_auth}/{p}" for p in ("login", "login/batch"))
+
+_decode_pubkey = binary_decoder((33,))
+
+def _body_pubkey(body: bytes) -> Optional[bytes]:
+    # Decoded like the request schemas do, so hex, upper-case hex and base64 spellings share a bucket
+    try:
+        pubkey = json.loads(body).get("pubkey")
+        return _decode_pubkey(pubkey).raw if isinstance(pubkey, str) else None
+    except (ValueError, AttributeError):
+        return None
+
+class RateLimitMiddleware:
+    """Pure ASGI per-IP and per-pubkey rate limiting on the auth endpoints, plus load shedding on login.
+
+    Limited requests get 429 and shed ones 503, both with Retry-After. For the
+    per-pubkey limit the JSON body is buffered and replayed to the app; bodies
+    over max_body_bytes get 413 without being read further.
+    The client address is scope["client"]; behind a reverse proxy run uvicorn
+    with --proxy-headers so that it is the real client.
+    """
+
+    def __init__(self, app, ip_limiter: TokenBucketLimiter = ip_limiter, pubkey_limiter: TokenBucketLimiter = pubkey_limiter,
+                 load_shedder: LoadShedder = load_shedder, ip_paths: FrozenSet[str] = IP_LIMITED_PATHS,
+                 pubkey_paths: FrozenSet[str] = PUBKEY_LIMITED_PATHS, shed_paths: FrozenSet[str] = SHED_PATHS,
+                 max_body_bytes: int = settings.RATE_LIMIT_MAX_BODY_BYTES):
+        self.app = app
+        self.ip_limiter = ip_limiter
+        self.pubkey_limiter = pubkey_limiter
+        self.load_shedder = load_shedder
+        self.ip_paths = ip_paths
+        self.pubkey_paths = pubkey_paths
+        self.shed_paths = shed_paths
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or scope["method"] != "POST" or path not in self.ip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        wait = self.ip_limiter.acquire(client[0] if client else None)
+        if wait:
+            RATE_LIMITED.labels("ip").inc()
+            await _refuse(send, 429, "Too many requests from this address", wait)
+            return
+
+        if path in self.pubkey_paths:
+            messages = await _read_body(scope, receive, self.max_body_bytes)
+            if messages is None:
+                await _refuse(send, 413, "Request body too large")
+                return
+            pubkey = _body_pubkey(b"".join(m.get("body", b"") for m in messages))
+            if pubkey is not None:
+                wait = self.pubkey_limiter.acquire(pubkey)
+                if wait:
+                    RATE_LIMITED.labels("pubkey").inc()
+                    await _refuse(send, 429, "Too many requests for this public key", wait)
+                    return
+            receive = _replay(messages, receive)
+
+        if path not in self.shed_paths:
+            await self.app(scope, receive, send)
+            return
+
+        reason, retry_after = self.load_shedder.try_acquire()
+        if reason is not None:
+            await _refuse(send, 503, "Server busy, retry later", retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.load_shedder.release()
+
+async def _read_body(scope, receive, limit: int) -> Optional[List[dict]]:
+    """The request's body messages, or None as soon as the body is known to exceed limit."""
+    for name, value in scope.get("headers", ()):
+        if name == b"content-length":
+            try:
+                if int(value) > limit:
+                    return None
+            except ValueError:
+                pass
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        size += len(message.get("body", b""))
+        if size > limit:
+            return None
+        if message["type"] != "http.request" or not message.get("more_body", False):
+            return messages
+
+def _replay(messages: List[dict], receive):
+    pending = iter(messages)
+
+    async def replay_receive():
+        message = next(pending, None)
+        return message if message is not None else await receive()
+
+    return replay_receive
+
+async def _refuse(send, status: int, detail: str, retry_after: Optional[float] = None) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(max(1, math.ceil(retry_after))).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""Pure-Python secp256k1 Schnorr verification for deployments without coincurve.
+
+Drop-in replacement for the ecdsa-based verify_schnorr_signature: points are kept
+in Jacobian coordinates so no field inversion happens per addition, s*G - e*P is
+evaluated in one pass (Shamir's trick) over wNAF digits, odd multiples of G are
+precomputed once at import and odd multiples of hot public keys are cached.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+FIELD_PRIME = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+CURVE_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+GENERATOR = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+)
+
+G_WINDOW = 8  # 64 precomputed odd multiples of G
+P_WINDOW = 5  # 8 odd multiples per public key
+
+Affine = Tuple[int, int]
+Jacobian = Tuple[int, int, int]
+# (compressed or x-only public key hex, 64-byte r || s signature hex, message)
+LegacySignature = Tuple[str, str, bytes]
+
+BIP340_CHALLENGE_TAG = "BIP0340/challenge"
+
+_INFINITY: Jacobian = (1, 1, 0)
+
+def _double(point: Jacobian) -> Jacobian:
+    X, Y, Z = point
+    if not Z or not Y:
+        return _INFINITY
+    p = FIELD_PRIME
+    YY = Y * Y % p
+    S = 4 * X * YY % p
+    M = 3 * X * X % p
+    X3 = (M * M - 2 * S) % p
+    return X3, (M * (S - X3) - 8 * YY * YY) % p, 2 * Y * Z % p
+
+def _add_affine(point: Jacobian, x2: int, y2: int) -> Jacobian:
+    """Jacobian + affine (mixed) addition."""
+    X1, Y1, Z1 = point
+    if not Z1:
+        return x2, y2, 1
+    p = FIELD_PRIME
+    Z1Z1 = Z1 * Z1 % p
+    H = (x2 * Z1Z1 - X1) % p
+    r = (y2 * Z1 * Z1Z1 - Y1) % p
+    if not H:
+        return _double(point) if not r else _INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = X1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    return X3, (r * (V - X3) - Y1 * HHH) % p, Z1 * H % p
+
+def _to_affine_many(points: Sequence[Jacobian]) -> List[Affine]:
+    """Convert to affine with one shared field inversion (Montgomery's trick); no point may be infinity."""
+    p = FIELD_PRIME
+    prefix = []
+    acc = 1
+    for _, _, Z in points:
+        prefix.append(acc)
+        acc = acc * Z % p
+    inv = pow(acc, -1, p)
+    affine: List[Affine] = [(0, 0)] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        X, Y, Z = points[i]
+        z_inv = inv * prefix[i] % p
+        inv = inv * Z % p
+        z_inv2 = z_inv * z_inv % p
+        affine[i] = (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+    return affine
+
+def _odd_multiples(point: Affine, window: int) -> List[Jacobian]:
+    """P, 3P, 5P, ... (2^(window-1) - 1)P in Jacobian coordinates."""
+    twice = _to_affine_many([_double((*point, 1))])[0]
+    multiples = [(*point, 1)]
+    for _ in range(2 ** (window - 2) - 1):
+        multiples.append(_add_affine(multiples[-1], *twice))
+    return multiples
+
+def _odd_multiples_many(points: Sequence[Affine], window: int) -> List[List[Affine]]:
+    tables = [_odd_multiples(point, window) for point in points]
+    flat = _to_affine_many([m for table in tables for m in table])
+    size = 2 ** (window - 2)
+    return [flat[i:i + size] for i in range(0, len(flat), size)]
+
+def _wnaf(k: int, window: int) -> List[int]:
+    """Width-w non-adjacent form, least significant digit first; non-zero digits are odd."""
+    digits = []
+    full = 1 << window
+    half = full >> 1
+    while k:
+        if k & 1:
+            digit = k & (full - 1)
+            if digit >= half:
+                digit -= full
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+_G_TABLE = _odd_multiples_many([GENERATOR], G_WINDOW)[0]
+
+def _shamir(s: int, k: int, table: List[Affine]) -> Jacobian:
+    """s*G + k*P, sharing one chain of doublings between both scalars."""
+    p = FIELD_PRIME
+    s_digits = _wnaf(s, G_WINDOW)
+    k_digits = _wnaf(k, P_WINDOW)
+    s_digits += [0] * (len(k_digits) - len(s_digits))
+    k_digits += [0] * (len(s_digits) - len(k_digits))
+
+    acc = _INFINITY
+    for i in range(len(s_digits) - 1, -1, -1):
+        acc = _double(acc)
+        digit = s_digits[i]
+        if digit:
+            x, y = _G_TABLE[abs(digit) >> 1]
+            acc = _add_affine(acc, x, y if digit > 0 else p - y)
+        digit = k_digits[i]
+        if digit:
+            x, y = table[abs(digit) >> 1]
+            acc = _add_affine(acc, x, y if digit > 0 else p - y)
+    return acc
+
+def lift_x(x: int, parity: int) -> Optional[Affine]:
+    """The curve point with this x and y parity, or None if x is not on the curve."""
+    p = FIELD_PRIME
+    if x >= p:
+        return None
+    y2 = (pow(x, 3, p) + 7) % p
+    y = pow(y2, (p + 1) // 4, p)
+    if y * y % p != y2:
+        return None
+    return x, (y if y & 1 == parity else p - y)
+
+def decode_pubkey(raw: bytes) -> Optional[Affine]:
+    """Accepts compressed (33 bytes) or x-only (32 bytes, even y) keys."""
+    if len(raw) == 33 and raw[0] in (2, 3):
+        return lift_x(int.from_bytes(raw[1:], "big"), raw[0] & 1)
+    if len(raw) == 32:
+        return lift_x(int.from_bytes(raw, "big"), 0)
+    raise ValueError("Invalid public key format")
+
+@lru_cache(maxsize=settings.PUBKEY_TABLE_CACHE_SIZE)
+def _pubkey_table(raw: bytes) -> Optional[List[Affine]]:
+    point = decode_pubkey(raw)
+    return None if point is None else _odd_multiples_many([point], P_WINDOW)[0]
+
+@lru_cache(maxsize=None)
+def _tag_midstate(tag: str) -> "hashlib._Hash":
+    # sha256(tag) || sha256(tag) is exactly one 64-byte block, so this state can be copied
+    tag_hash = hashlib.sha256(tag.encode()).digest()
+    return hashlib.sha256(tag_hash + tag_hash)
+
+def tagged_hash(tag: str, data: bytes) -> bytes:
+    """BIP-340 tagged hash, resuming from the precomputed midstate of the tag prefix."""
+    h = _tag_midstate(tag).copy()
+    h.update(data)
+    return h.digest()
+
+def _x_matches(point: Jacobian, r: int) -> bool:
+    """Affine x of point == r, without inverting Z."""
+    X, _, Z = point
+    return bool(Z) and X == r * Z * Z % FIELD_PRIME
+
+def _verify(table: List[Affine], x_bytes: bytes, signature: bytes, message: bytes) -> bool:
+    if len(signature) != 64:
+        return False
+    r = int.from_bytes(signature[:32], "big")
+    s = int.from_bytes(signature[32:], "big")
+    if r >= FIELD_PRIME or s >= CURVE_ORDER:
+        return False
+
+    e = int.from_bytes(hashlib.sha256(signature[:32] + x_bytes + message).digest(), "big") % CURVE_ORDER
+    # R = s*G - e*P
+    return _x_matches(_shamir(s, -e % CURVE_ORDER, table), r)
+
+def verify_schnorr_signature(pubkey_hex: str, signature_hex: str, message: bytes) -> bool:
+    """Check a 64-byte r || s signature where e = sha256(r || x(P) || message) and x(s*G - e*P) == r."""
+    raw_pub = bytes.fromhex(pubkey_hex)
+    table = _pubkey_table(raw_pub)
+    if table is None:
+        return False
+    return _verify(table, raw_pub[-32:], bytes.fromhex(signature_hex), message)
+
+def verify_schnorr_batch(signatures: Sequence[LegacySignature]) -> List[bool]:
+    """verify_schnorr_signature for many signatures; invalid inputs give False instead of raising.
+
+    Each public key is decoded and tabulated once per batch (or taken from the
+    cache), but every signature still needs its own s*G - e*P: only the x of R
+    is signed, so R cannot be lifted unambiguously for a random linear combination.
+    """
+    tables: Dict[bytes, Optional[List[Affine]]] = {}
+    results = []
+    for pubkey_hex, signature_hex, message in signatures:
+        try:
+            raw_pub = bytes.fromhex(pubkey_hex)
+            if raw_pub not in tables:
+                tables[raw_pub] = _pubkey_table(raw_pub)
+            table = tables[raw_pub]
+            results.append(table is not None and _verify(table, raw_pub[-32:], bytes.fromhex(signature_hex), message))
+        except ValueError:
+            results.append(False)
+    return results
+
+def verify_bip340(pubkey_x: bytes, signature: bytes, message: bytes) -> bool:
+    """BIP-340 verification: 32-byte x-only key, 64-byte R.x || s signature, R must have even y."""
+    if len(pubkey_x) != 32 or len(signature) != 64:
+        return False
+    table = _pubkey_table(pubkey_x)
+    if table is None:
+        return False
+    r = int.from_bytes(signature[:32], "big")
+    s = int.from_bytes(signature[32:], "big")
+    if r >= FIELD_PRIME or s >= CURVE_ORDER:
+        return False
+
+    e = int.from_bytes(tagged_hash(BIP340_CHALLENGE_TAG, signature[:32] + pubkey_x + message), "big") % CURVE_ORDER
+    R = _shamir(s, -e % CURVE_ORDER, table)
+    if not _x_matches(R, r):
+        return False
+    _, Y, Z = R
+    z_inv = pow(Z, -1, FIELD_PRIME)
+    return Y * z_inv * z_inv * z_inv % FIELD_PRIME & 1 == 0
\ No newline at end of file
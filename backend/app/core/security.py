@@ -1,68 +1,398 @@
+import asyncio
 import secrets
 import time
-from typing import Dict, Tuple, Optional
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Tuple, Optional, Sequence, Set, Union
 import hashlib
 from loguru import logger
 import coincurve
-from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.challenges import create_challenge_store
+from app.core.encoding import raw_bytes
+from app.core.metrics import CHALLENGES_ISSUED, CHALLENGE_STORE_SIZE, VERIFY_STAGE_SECONDS, VERIFY_REJECTIONS
+
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+# (public key point, commitment point R, response s, challenge hash e)
+CommitmentProof = Tuple[coincurve.PublicKey, coincurve.PublicKey, bytes, bytes]
+# BIP-340: (x-only public key, 64-byte signature R.x || s, signed challenge)
+Bip340Proof = Tuple[coincurve.PublicKeyXOnly, bytes, bytes]
+SchnorrProof = Union[CommitmentProof, Bip340Proof]
+# Same proofs with the points as bytes, so they can cross a process boundary
+EncodedSchnorrProof = Union[Tuple[bytes, bytes, bytes, bytes], Tuple[bytes, bytes, bytes]]
+# Public key point, compressed R, response s, challenge hash e: all the combined check needs
+_CheckInput = Tuple[coincurve.PublicKey, bytes, bytes, bytes]
+
+challenge_store = create_challenge_store(
+    settings.CHALLENGE_BACKEND,
+    ttl=settings.CHALLENGE_TTL,
+    capacity=settings.CHALLENGE_STORE_CAPACITY,
+    shards=settings.CHALLENGE_STORE_SHARDS,
+    mmap_path=settings.CHALLENGE_MMAP_PATH,
+    secret=settings.CHALLENGE_SECRET
+)
+CHALLENGE_STORE_SIZE.set_function(challenge_store.size)
+
+_decode_seconds = VERIFY_STAGE_SECONDS.labels("decode")
+_hash_seconds = VERIFY_STAGE_SECONDS.labels("hash")
+_ec_seconds = VERIFY_STAGE_SECONDS.labels("ec")
+
+CHALLENGE_ERRORS = {
+    "no_challenge": "No active challenge session",
+    "challenge_mismatch": "Challenge mismatch",
+    "expired": "Challenge expired",
+    "replayed": "Challenge already used",
+    "invalid_challenge": "Invalid challenge",
+}
+
+def _reject(reason: str, message: Optional[str]) -> Tuple[None, Optional[str]]:
+    VERIFY_REJECTIONS.labels(reason).inc()
+    return None, message
+
+@lru_cache(maxsize=settings.PUBKEY_CACHE_SIZE)
+def decode_pubkey(encoded: bytes) -> coincurve.PublicKey:
+    """Parse a public key, keeping the points of recently seen (returning) users decoded."""
+    return coincurve.PublicKey(encoded)
+
+@lru_cache(maxsize=settings.PUBKEY_CACHE_SIZE)
+def decode_xonly_pubkey(encoded: bytes) -> coincurve.PublicKeyXOnly:
+    return coincurve.PublicKeyXOnly(encoded)
+
+def _cache_stats(info) -> dict:
+    lookups = info.hits + info.misses
+    return {**info._asdict(), "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0}
+
+def pubkey_cache_stats() -> dict:
+    return {
+        "compressed": _cache_stats(decode_pubkey.cache_info()),
+        "xonly": _cache_stats(decode_xonly_pubkey.cache_info()),
+    }
 
-challenge_store: Dict[str, Tuple[str, float, str]] = {}  
 def generate_challenge() -> str:
     return secrets.token_hex(32)
 
 def schnorr_verify_commitment(pubkey_hex: str) -> Tuple[str, str]:
-    logger.debug(f"Generating challenge for pubkey: {pubkey_hex[:10]}...")
-    challenge = generate_challenge()
-    challenge_store[pubkey_hex] = (challenge, time.time(), None)
-    logger.info(f"Challenge generated for pubkey {pubkey_hex[:10]}...")
-    logger.debug(f"Challenge value: {challenge[:16]}...")
+    logger.debug("Generating challenge for pubkey: {}...", pubkey_hex[:10])
+    challenge = challenge_store.issue(pubkey_hex)
+    CHALLENGES_ISSUED.inc()
+    logger.debug("Challenge generated for pubkey {}...", pubkey_hex[:10])
+    logger.debug("Challenge value: {}...", challenge[:16])
     
     return challenge
 
-def schnorr_verify_response(pubkey_hex: str, challenge_hex: str, R_hex: str, s_hex: str) -> Tuple[bool, Optional[str]]:
-    logger.info(f"Verifying Schnorr ZKP for pubkey: {pubkey_hex[:10]}...")
-    
-    if pubkey_hex not in challenge_store:
-        logger.warning(f"No active challenge session for pubkey: {pubkey_hex[:10]}...")
-        return False, "No active challenge session"
-    
-    stored_challenge, timestamp, _ = challenge_store.pop(pubkey_hex)
-    
-    if challenge_hex != stored_challenge:
-        logger.warning(f"Challenge mismatch for pubkey: {pubkey_hex[:10]}...")
-        return False, "Challenge mismatch"
+def schnorr_prepare_proof(pubkey_hex: str, challenge_hex: str, R_hex: Optional[str], s_hex: Optional[str],
+                          signature_hex: Optional[str] = None) -> Tuple[Optional[SchnorrProof], Optional[str]]:
+    """Consume the stored challenge and decode a proof, without doing any EC verification.
+
+    With signature_hex the proof is a BIP-340 signature over the challenge bytes,
+    checked against the x-only form of pubkey; otherwise it is (R, s) over
+    sha256(R || P || challenge).
+    """
+    reason = challenge_store.redeem(pubkey_hex, challenge_hex)
+    if reason is not None:
+        message = CHALLENGE_ERRORS[reason]
+        logger.warning(f"{message} for pubkey: {pubkey_hex[:10]}...")
+        return _reject(reason, message)
     
-    if time.time() - timestamp > 300:
-        logger.warning(f"Challenge expired for pubkey: {pubkey_hex[:10]}...")
-        return False, "Challenge expired"
+    if signature_hex is not None:
+        return _prepare_bip340(pubkey_hex, challenge_hex, signature_hex)
     
     try:
-        pubkey_bytes = bytes.fromhex(pubkey_hex)
-        R_bytes = bytes.fromhex(R_hex)
-        s_bytes = bytes.fromhex(s_hex)
-        challenge_bytes = bytes.fromhex(challenge_hex)
+        start = time.perf_counter()
+        # Request schemas hand over HexBytes, so these are usually already decoded
+        pubkey_bytes = raw_bytes(pubkey_hex)
+        R_bytes = raw_bytes(R_hex)
+        s_bytes = raw_bytes(s_hex)
+        challenge_bytes = raw_bytes(challenge_hex)
         
-        logger.debug(f"Schnorr verification components:")
-        logger.debug(f"  R: {R_hex[:16]}...")
-        logger.debug(f"  s: {s_hex[:16]}...")
-        logger.debug(f"  challenge: {challenge_hex[:16]}...")
+        logger.debug("Schnorr verification components: R={}... s={}... challenge={}...", R_hex[:16], s_hex[:16], challenge_hex[:16])
         
         try:
-            public_key_point = coincurve.PublicKey(pubkey_bytes)
+            public_key_point = decode_pubkey(pubkey_bytes)
             R_point = coincurve.PublicKey(R_bytes)
         except Exception as e:
             logger.error(f"Invalid point encoding: {e}")
-            return False, "Invalid public key or commitment"
+            return _reject("invalid_point", "Invalid public key or commitment")
+        decoded = time.perf_counter()
+        _decode_seconds.observe(decoded - start)
         
         e_bytes = hashlib.sha256(R_bytes + pubkey_bytes + challenge_bytes).digest()
-        s_G = coincurve.PublicKey.from_secret(s_bytes) # Verify: s*G = R + e*P
-        e_times_pubkey = public_key_point.multiply(e_bytes) # e * public_key (scalar multiplication)
-        expected = R_point.combine([e_times_pubkey]) # R + e*public_key (point addition)
+        _hash_seconds.observe(time.perf_counter() - decoded)
+        return (public_key_point, R_point, s_bytes, e_bytes), None
         
-        is_valid = s_G.format() == expected.format()
+    except Exception as e:
+        logger.error(f"Error during Schnorr verification: {str(e)}")
+        return _reject("error", f"Verification error: {str(e)}")
+
+def _prepare_bip340(pubkey_hex: str, challenge_hex: str, signature_hex: str) -> Tuple[Optional[Bip340Proof], Optional[str]]:
+    try:
+        start = time.perf_counter()
+        signature = raw_bytes(signature_hex)
+        if len(signature) != 64:
+            return _reject("invalid_point", "Invalid signature length")
+        try:
+            # Compressed keys drop their parity byte; BIP-340 keys always have even y
+            public_key = decode_xonly_pubkey(raw_bytes(pubkey_hex)[-32:])
+        except Exception as e:
+            logger.error(f"Invalid x-only public key: {e}")
+            return _reject("invalid_point", "Invalid public key")
+        _decode_seconds.observe(time.perf_counter() - start)
+        return (public_key, signature, raw_bytes(challenge_hex)), None
+    
+    except Exception as e:
+        logger.error(f"Error during Schnorr verification: {str(e)}")
+        return _reject("error", f"Verification error: {str(e)}")
+
+def schnorr_verify_bip340(public_key: coincurve.PublicKeyXOnly, signature: bytes, message: bytes) -> bool:
+    # libsecp256k1 computes the BIP0340/challenge tagged hash from a built-in midstate
+    return public_key.verify(signature, message)
+
+def _der_integer(value: int) -> bytes:
+    encoded = value.to_bytes((value.bit_length() + 8) // 8, "big")
+    return b"\x02" + bytes([len(encoded)]) + encoded
+
+def _inverses(values: Sequence[int]) -> List[int]:
+    """Inverses mod the group order of non-zero scalars, sharing one pow() (Montgomery's trick)."""
+    prefix = []
+    acc = 1
+    for value in values:
+        prefix.append(acc)
+        acc = acc * value % SECP256K1_ORDER
+    inv = pow(acc, -1, SECP256K1_ORDER)
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        inverses[i] = inv * prefix[i] % SECP256K1_ORDER
+        inv = inv * values[i] % SECP256K1_ORDER
+    return inverses
+
+def schnorr_verify_combined(public_key_point: coincurve.PublicKey, R_bytes: bytes, s: int, e_inv: int) -> bool:
+    """Check s*G - e*P == R with one multi-scalar multiplication.
+
+    libsecp256k1 only exposes its combined u1*G + u2*P through ECDSA verification,
+    which accepts when x(u1*G + u2*P) mod n == r. Taking r = x(R), sig = -r/e and
+    z = s*sig gives u1 = z/sig = s and u2 = r/sig = -e. Only x is compared, so -R
+    passes as well; e already commits to the full encoding of R, so that is no
+    easier to forge than the two-multiplication check.
+    """
+    r = int.from_bytes(R_bytes[1:], "big") % SECP256K1_ORDER
+    if not r:
+        return False
+    sig = -r * e_inv % SECP256K1_ORDER
+    z = s * sig % SECP256K1_ORDER
+    # Only low-S signatures verify; negating sig negates the point, which keeps its x
+    if sig > SECP256K1_ORDER >> 1:
+        sig = SECP256K1_ORDER - sig
+    body = _der_integer(r) + _der_integer(sig)
+    return public_key_point.verify(b"\x30" + bytes([len(body)]) + body, z.to_bytes(32, "big"), hasher=None)
+
+def _verify_each(items: Sequence[_CheckInput]) -> List[bool]:
+    scalars = [
+        (int.from_bytes(s_bytes, "big"), int.from_bytes(e_bytes, "big") % SECP256K1_ORDER)
+        for _, _, s_bytes, e_bytes in items
+    ]
+    inverses = _inverses([e or 1 for _, e in scalars])
+
+    results = []
+    for (public_key_point, R_bytes, _, _), (s, e), e_inv in zip(items, scalars, inverses):
+        try:
+            if not 0 < s < SECP256K1_ORDER:
+                results.append(False)
+            elif e == 0:
+                results.append(coincurve.PublicKey.from_secret(s.to_bytes(32, "big")).format() == R_bytes)
+            else:
+                results.append(schnorr_verify_combined(public_key_point, R_bytes, s, e_inv))
+        except Exception as exc:
+            logger.error(f"Error during Schnorr verification: {str(exc)}")
+            results.append(False)
+    return results
+
+def schnorr_batch_verify(items: Sequence[_CheckInput]) -> bool:
+    """Check many commitment proofs at once with a random linear combination.
+
+    For random a_i this tests (sum a_i*s_i)*G == sum a_i*R_i + sum (a_i*e_i)*P_i,
+    which holds for every batch of valid proofs and fails with overwhelming
+    probability if any single proof is invalid. A False result does not say
+    which proof is bad. The e terms of proofs under the same key are summed
+    first, so returning users cost one multiplication per batch instead of one
+    per proof.
+    """
+    if not items:
+        return True
+
+    s_sum = 0
+    terms: List[coincurve.PublicKey] = []
+    key_scalars: Dict[bytes, Tuple[coincurve.PublicKey, int]] = {}
+    try:
+        for i, (public_key_point, R_bytes, s_bytes, e_bytes) in enumerate(items):
+            # a_0 = 1 saves one multiplication, the rest are random 128-bit weights
+            a = 1 if i == 0 else secrets.randbits(128) | 1
+            s = int.from_bytes(s_bytes, "big")
+            if not 0 < s < SECP256K1_ORDER:
+                return False
+            s_sum = (s_sum + a * s) % SECP256K1_ORDER
+            R_point = coincurve.PublicKey(R_bytes)
+            terms.append(R_point if a == 1 else R_point.multiply(a.to_bytes(32, "big")))
+            key = public_key_point.format()
+            ae = a * int.from_bytes(e_bytes, "big")
+            _, total = key_scalars.get(key, (public_key_point, 0))
+            key_scalars[key] = (public_key_point, (total + ae) % SECP256K1_ORDER)
+
+        for public_key_point, ae in key_scalars.values():
+            if ae:
+                terms.append(public_key_point.multiply(ae.to_bytes(32, "big")))
+        if s_sum == 0:
+            return False
+        lhs = coincurve.PublicKey.from_secret(s_sum.to_bytes(32, "big"))
+        rhs = coincurve.PublicKey.combine_keys(terms)
+        return lhs.format() == rhs.format()
+    except Exception as e:
+        logger.debug("Batch verification of {} proofs raised: {}", len(items), e)
+        return False
+
+def _verify_commitments(items: Sequence[_CheckInput], batch: bool) -> List[bool]:
+    # Only a failed combination pays for the per-proof checks that find the bad proofs
+    if batch and len(items) > 1 and settings.LOGIN_BATCH_LINEAR_COMBINATION:
+        if schnorr_batch_verify(items):
+            return [True] * len(items)
+        logger.debug("Linear combination of {} proofs failed, checking each", len(items))
+    return _verify_each(items)
+
+def _verify_mixed(items: Sequence[Union[_CheckInput, Bip340Proof]], batch: bool = False) -> List[bool]:
+    results = [False] * len(items)
+    commitment = [i for i, item in enumerate(items) if len(item) == 4]
+    for i, ok in zip(commitment, _verify_commitments([items[i] for i in commitment], batch)):
+        results[i] = ok
+    for i, item in enumerate(items):
+        if len(item) == 3:
+            try:
+                results[i] = schnorr_verify_bip340(*item)
+            except Exception as e:
+                logger.error(f"Error during BIP-340 verification: {str(e)}")
+    return results
+
+def schnorr_verify_proof(proof: SchnorrProof) -> bool:
+    return schnorr_verify_proofs([proof])[0]
+
+def _check_inputs(proofs: Sequence[SchnorrProof]) -> List[Union[_CheckInput, Bip340Proof]]:
+    return [proof if len(proof) == 3 else (proof[0], proof[1].format(), proof[2], proof[3]) for proof in proofs]
+
+def schnorr_verify_proofs(proofs: Sequence[SchnorrProof]) -> List[bool]:
+    """Per-proof results: one combined multiplication per commitment proof, libsecp256k1's
+    schnorrsig_verify per BIP-340 proof."""
+    return _verify_mixed(_check_inputs(proofs))
+
+def schnorr_verify_batch(proofs: Sequence[SchnorrProof]) -> List[bool]:
+    """schnorr_verify_proofs, but the commitment proofs are first checked together with
+    schnorr_batch_verify and only checked one by one if that fails."""
+    return _verify_mixed(_check_inputs(proofs), batch=True)
+
+def schnorr_encode_proofs(proofs: Sequence[SchnorrProof]) -> List[EncodedSchnorrProof]:
+    return [(proof[0].format(), *proof[1:]) if len(proof) == 3 else
+            (proof[0].format(), proof[1].format(), proof[2], proof[3]) for proof in proofs]
+
+def schnorr_verify_many_encoded(proofs: Sequence[EncodedSchnorrProof]) -> List[bool]:
+    """schnorr_verify_batch for proofs produced by schnorr_encode_proofs; safe to run in a worker process."""
+    # R is only needed as bytes, and each worker keeps its own cache of decoded pubkeys
+    return _verify_mixed([(decode_xonly_pubkey(proof[0]), *proof[1:]) if len(proof) == 3 else
+                          (decode_pubkey(proof[0]), *proof[1:]) for proof in proofs], batch=True)
+
+def schnorr_verify_many_encoded_timed(proofs: Sequence[EncodedSchnorrProof]) -> Tuple[List[bool], float]:
+    """schnorr_verify_many_encoded plus the seconds it took, measured where it ran."""
+    start = time.perf_counter()
+    results = schnorr_verify_many_encoded(proofs)
+    return results, time.perf_counter() - start
+
+def record_verification(results: Sequence[bool], seconds: float) -> None:
+    """Feed the EC-stage histogram (amortized per proof) and count invalid proofs."""
+    if results:
+        per_proof = seconds / len(results)
+        for _ in results:
+            _ec_seconds.observe(per_proof)
+    rejected = sum(not r for r in results)
+    if rejected:
+        VERIFY_REJECTIONS.labels("invalid_proof").inc(rejected)
+
+BatchRunner = Callable[[List[SchnorrProof]], Awaitable[List[bool]]]
+
+class SchnorrBatchVerifier:
+    """Coalesces concurrent verifications into one schnorr_verify_batch call.
+
+    A batch is flushed when it reaches max_batch_size or max_delay seconds after
+    its first proof was queued, whichever comes first. If a runner is given the
+    batch is handed to it (e.g. to verify off the event loop), otherwise it is
+    verified inline.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_delay: float = 0.002, runner: Optional[BatchRunner] = None):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.runner = runner
+        self._pending: List[Tuple[SchnorrProof, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def verify(self, proof: SchnorrProof) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((proof, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        logger.debug("Flushing Schnorr verification batch of {}", len(batch))
+        if self.runner is None:
+            self._resolve(batch, schnorr_verify_batch([proof for proof, _ in batch]))
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[SchnorrProof, asyncio.Future]]) -> None:
+        try:
+            results = await self.runner([proof for proof, _ in batch])
+        except Exception as e:
+            logger.error(f"Schnorr verification batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._resolve(batch, results)
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[SchnorrProof, asyncio.Future]], results: List[bool]) -> None:
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+def schnorr_verify_response(pubkey_hex: str, challenge_hex: str, R_hex: Optional[str], s_hex: Optional[str],
+                            signature_hex: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    logger.debug("Verifying Schnorr ZKP for pubkey: {}...", pubkey_hex[:10])
+    
+    proof, error_msg = schnorr_prepare_proof(pubkey_hex, challenge_hex, R_hex, s_hex, signature_hex)
+    if proof is None:
+        return False, error_msg
+    
+    try:
+        start = time.perf_counter()
+        is_valid = schnorr_verify_proof(proof)
+        record_verification([is_valid], time.perf_counter() - start)
         
         if is_valid:
-            logger.info(f"Schnorr ZKP verification successful for pubkey: {pubkey_hex[:10]}...")
+            logger.debug("Schnorr ZKP verification successful for pubkey: {}...", pubkey_hex[:10])
         else:
             logger.warning(f"Schnorr ZKP verification failed for pubkey: {pubkey_hex[:10]}...")
             
@@ -70,4 +400,5 @@ def schnorr_verify_response(pubkey_hex: str, challenge_hex: str, R_hex: str, s_h
         
     except Exception as e:
         logger.error(f"Error during Schnorr verification: {str(e)}")
-        return False, f"Verification error: {str(e)}"
\ No newline at end of file
+        VERIFY_REJECTIONS.labels("error").inc()
+        return False, f"Verification error: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,105 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from loguru import logger
+from app.core.config import settings
+from app.core.challenges import ReplayFilter
+from app.core.metrics import SESSIONS_ISSUED, SESSION_REJECTIONS
+
+@dataclass(frozen=True)
+class SessionClaims:
+    user_id: int
+    token_id: bytes
+    expires_at: int
+
+class SessionManager:
+    """HMAC-signed session tokens, handed out after a successful Schnorr login.
+
+    A token is version (1 byte) || user id (8) || expiry (8, unix seconds) ||
+    token id (16, random) || HMAC-SHA256 of the preceding bytes, base64url
+    without padding. Validating one is a MAC and a Bloom filter lookup: no DB
+    or EC work. Revoked token ids go into a ReplayFilter spanning one TTL, so
+    a revocation costs a few bits and is dropped once the token would have
+    expired anyway. Like the replay filter of stateless challenges, revocations
+    are per process: with several workers, a revoked token is only rejected by
+    the worker that revoked it and stays valid on the others until it expires.
+    """
+
+    VERSION = 1
+    _PAYLOAD = struct.Struct(">BQQ16s")
+    _TOKEN_SIZE = _PAYLOAD.size + hashlib.sha256().digest_size
+
+    def __init__(self, key: bytes, ttl: int, revocation_capacity: int = 100_000, false_positive_rate: float = 1e-6):
+        self._key = key
+        self.ttl = ttl
+        self._revoked = ReplayFilter(ttl, revocation_capacity, false_positive_rate)
+        self.issued = 0
+        self.revoked = 0
+
+    def _mac(self, payload: bytes) -> bytes:
+        return hmac.digest(self._key, payload, "sha256")
+
+    def issue(self, user_id: int, now: Optional[float] = None) -> Tuple[str, int]:
+        """A new token for user_id and its expiry (unix seconds)."""
+        expires_at = int((time.time() if now is None else now) + self.ttl)
+        payload = self._PAYLOAD.pack(self.VERSION, user_id, expires_at, secrets.token_bytes(16))
+        self.issued += 1
+        SESSIONS_ISSUED.inc()
+        return base64.urlsafe_b64encode(payload + self._mac(payload)).rstrip(b"=").decode(), expires_at
+
+    def validate(self, token: str, now: Optional[float] = None) -> Tuple[Optional[SessionClaims], Optional[str]]:
+        """The token's claims, or None and why it was rejected: malformed, bad_signature, expired, revoked."""
+        self._revoked.rotate_if_due(now)
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (binascii.Error, ValueError):
+            raw = b""
+        if len(raw) != self._TOKEN_SIZE or raw[0] != self.VERSION:
+            return self._reject("malformed")
+
+        payload, mac = raw[:self._PAYLOAD.size], raw[self._PAYLOAD.size:]
+        if not hmac.compare_digest(mac, self._mac(payload)):
+            return self._reject("bad_signature")
+        _, user_id, expires_at, token_id = self._PAYLOAD.unpack(payload)
+        if (time.time() if now is None else now) > expires_at:
+            return self._reject("expired")
+        if token_id in self._revoked:
+            return self._reject("revoked")
+        return SessionClaims(user_id, token_id, expires_at), None
+
+    @staticmethod
+    def _reject(reason: str) -> Tuple[None, str]:
+        SESSION_REJECTIONS.labels(reason).inc()
+        return None, reason
+
+    def revoke(self, claims: SessionClaims) -> None:
+        self._revoked.rotate_if_due()
+        if self._revoked.add_if_absent(claims.token_id):
+            self.revoked += 1
+
+    def stats(self) -> dict:
+        return {
+            "issued": self.issued,
+            "revoked": self.revoked,
+            "ttl": self.ttl,
+            "revocation_filter_entries": len(self._revoked),
+            "revocation_filter_bytes": 2 * ((self._revoked.bits + 7) // 8),
+        }
+
+def create_session_manager(secret: Optional[str], ttl: int, revocation_capacity: int,
+                           debug: bool = False, workers: int = 1) -> SessionManager:
+    if not secret:
+        if workers > 1 or not debug:
+            raise RuntimeError("SESSION_SECRET must be set outside DEBUG mode and when running more than one worker")
+        logger.warning("SESSION_SECRET is not set; session tokens will only validate on this process")
+    key = secret.encode() if secret else secrets.token_bytes(32)
+    return SessionManager(key, ttl=ttl, revocation_capacity=revocation_capacity)
+
+session_manager = create_session_manager(settings.SESSION_SECRET, settings.SESSION_TTL, settings.SESSION_REVOCATION_CAPACITY,
+                                         debug=settings.DEBUG, workers=settings.WEB_CONCURRENCY)
\ No newline at end of file
@@ -1,14 +1,17 @@
-from typing import Generic, TypeVar, Type, Optional, List, Dict, Any, Union
+from typing import Generic, TypeVar, Type, Optional, List, Dict, Any, Union, Iterator, Sequence, Tuple
 from sqlmodel import SQLModel, select, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
+from app.db.crud.cache import RecordCache
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(self, model: Type[ModelType], cache: Optional[RecordCache] = None):
         self.model = model
+        self.cache = cache
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.exec(select(self.model).where(self.model.id == id)).first()
@@ -18,6 +21,34 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.exec(select(self.model).offset(skip).limit(limit)).all()
 
+    def get_rows(
+        self, db: Session, *, columns: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> Sequence[Tuple[Any, ...]]:
+        """get_multi, but only the given columns, as tuples."""
+        query = select(*(getattr(self.model, c) for c in columns)).offset(skip).limit(limit)
+        return db.execute(query).all()
+
+    def get_rows_after(
+        self, db: Session, *, columns: Sequence[str], after_id: Optional[int] = None, limit: int = 100
+    ) -> Sequence[Tuple[Any, ...]]:
+        """Keyset page: the next `limit` rows with id > after_id, in id order, as tuples of columns."""
+        query = select(*(getattr(self.model, c) for c in columns)).order_by(self.model.id).limit(limit)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        return db.execute(query).all()
+
+    def iter_column_batches(
+        self, db: Session, *, columns: Sequence[str], batch_size: int = 1000
+    ) -> Iterator[Sequence[Tuple[Any, ...]]]:
+        """Yield rows of the given columns in id order, batch_size rows at a time.
+
+        Uses a server-side cursor where the driver supports one, so the whole
+        table is never held in memory.
+        """
+        query = select(*(getattr(self.model, c) for c in columns)).order_by(self.model.id)
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        yield from result.partitions()
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         db_obj = self.model(**obj_in.model_dump())
         db.add(db_obj)
@@ -33,15 +64,80 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         update_data = obj_in.model_dump() if isinstance(obj_in, BaseModel) else obj_in
+        stale = self.cache.keys(db_obj) if self.cache else []
+        if self.cache:
+            self.cache.invalidate_keys(stale)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        if self.cache:
+            # Again once committed: a read between the first invalidation and the
+            # commit may have cached the old row; the new values may be cached too
+            self.cache.invalidate_keys(stale + self.cache.keys(db_obj))
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.exec(select(self.model).where(self.model.id == id)).one()
+        stale = self.cache.keys(obj) if self.cache else []
+        if self.cache:
+            self.cache.invalidate_keys(stale)
         db.delete(obj)
         db.commit()
+        if self.cache:
+            self.cache.invalidate_keys(stale)
+        return obj
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType], cache: Optional[RecordCache] = None):
+        self.model = model
+        self.cache = cache
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        return (await db.exec(select(self.model).where(self.model.id == id))).first()
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        return (await db.exec(select(self.model).offset(skip).limit(limit))).all()
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        db_obj = self.model(**obj_in.model_dump())
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        update_data = obj_in.model_dump() if isinstance(obj_in, BaseModel) else obj_in
+        stale = self.cache.keys(db_obj) if self.cache else []
+        if self.cache:
+            self.cache.invalidate_keys(stale)
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        if self.cache:
+            # Again once committed: a read between the first invalidation and the
+            # commit may have cached the old row; the new values may be cached too
+            self.cache.invalidate_keys(stale + self.cache.keys(db_obj))
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
+        obj = (await db.exec(select(self.model).where(self.model.id == id))).one()
+        stale = self.cache.keys(obj) if self.cache else []
+        if self.cache:
+            self.cache.invalidate_keys(stale)
+        await db.delete(obj)
+        await db.commit()
+        if self.cache:
+            self.cache.invalidate_keys(stale)
         return obj
\ No newline at end of file
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from sqlmodel import SQLModel
+
+class RecordCache:
+    """LRU + TTL cache of model snapshots, addressable by several unique fields.
+
+    Cached values are detached copies, so they are safe to read after the
+    session that loaded them is gone but must be treated as read-only: load
+    the row again through a session before modifying it.
+    """
+
+    def __init__(self, model: type, fields: Tuple[str, ...], maxsize: int = 10_000, ttl: float = 60.0):
+        self.model = model
+        self.fields = fields
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, SQLModel]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, field: str, value: str) -> Optional[SQLModel]:
+        if not self.enabled:
+            return None
+        key = (field, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, obj: Optional[SQLModel]) -> Optional[SQLModel]:
+        """Cache a snapshot of obj under each of its unique fields and return the snapshot."""
+        if obj is None or not self.enabled:
+            return obj
+        snapshot = self.model.model_validate(obj)
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for field in self.fields:
+                key = (field, getattr(snapshot, field))
+                self._entries[key] = (expires_at, snapshot)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def keys(self, obj: Optional[SQLModel]) -> List[Tuple[str, str]]:
+        """The cache keys obj is stored under, read now, before a write changes them."""
+        if obj is None:
+            return []
+        return [(field, getattr(obj, field, None)) for field in self.fields]
+
+    def invalidate_keys(self, keys: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def invalidate(self, obj: Optional[SQLModel]) -> None:
+        self.invalidate_keys(self.keys(obj))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
\ No newline at end of file
@@ -1,35 +1,140 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Set
+from sqlalchemy import literal, union_all
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db.models import User
-from app.db.crud.base import CRUDBase
+from app.db.crud.base import CRUDBase, AsyncCRUDBase
+from app.db.crud.cache import RecordCache
 from app.schemas.user import UserCreate, UserUpdate
+from app.core.config import settings
+from app.core.metrics import DB_QUERY_SECONDS, timed
+
+UNIQUE_FIELDS = ("username", "email", "pubkey")
+CONFLICT_LABELS = {"username": "Username", "email": "Email", "pubkey": "Public key"}
+
+# Shared by the sync and async CRUD objects; lookups by unique field go through it
+user_cache = RecordCache(User, UNIQUE_FIELDS, maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+def _conflicts_query(username: Optional[str], email: Optional[str], pubkey: Optional[str]):
+    # One SELECT per unique field, glued with UNION ALL so all collisions come back in one round-trip
+    values = {"username": username, "email": email, "pubkey": pubkey}
+    parts = [
+        select(literal(field).label("field")).where(getattr(User, field) == value)
+        for field, value in values.items() if value
+    ]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else union_all(*parts)
+
+def _taken_query(values: Dict[str, Sequence[str]]):
+    # Set-based form of _conflicts_query: which of many values are already in use, per field
+    parts = [
+        select(literal(field).label("field"), getattr(User, field).label("value")).where(getattr(User, field).in_(items))
+        for field, items in values.items() if items
+    ]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else union_all(*parts)
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def _ordered_conflicts(rows) -> List[str]:
+    found = {row[0] for row in rows}
+    return [field for field in UNIQUE_FIELDS if field in found]
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    @timed(DB_QUERY_SECONDS, "get_by_email")
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.exec(select(User).where(User.email == email)).first()
+        if (cached := user_cache.get("email", email)) is not None:
+            return cached
+        return user_cache.put(db.exec(select(User).where(User.email == email)).first())
     
+    @timed(DB_QUERY_SECONDS, "get_by_username")
     def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
-        return db.exec(select(User).where(User.username == username)).first()
+        if (cached := user_cache.get("username", username)) is not None:
+            return cached
+        return user_cache.put(db.exec(select(User).where(User.username == username)).first())
     
+    @timed(DB_QUERY_SECONDS, "get_by_pubkey")
     def get_by_pubkey(self, db: Session, *, pubkey: str) -> Optional[User]:
-        return db.exec(select(User).where(User.pubkey == pubkey)).first()
+        if (cached := user_cache.get("pubkey", pubkey)) is not None:
+            return cached
+        return user_cache.put(db.exec(select(User).where(User.pubkey == pubkey)).first())
+    
+    @timed(DB_QUERY_SECONDS, "get_multi_by_pubkeys")
+    def get_multi_by_pubkeys(self, db: Session, *, pubkeys: List[str]) -> List[User]:
+        return db.exec(select(User).where(User.pubkey.in_(pubkeys))).all()
+        
+    @timed(DB_QUERY_SECONDS, "find_conflicts")
+    def find_conflicts(self, db: Session, *, username: str = None, email: str = None, pubkey: str = None) -> List[str]:
+        """Return which of username/email/pubkey are already taken, in that order."""
+        query = _conflicts_query(username, email, pubkey)
+        if query is None:
+            return []
+        return _ordered_conflicts(db.execute(query).all())
         
     def exists_by_fields(self, db: Session, *, username: str = None, email: str = None, pubkey: str = None) -> bool:
-        query = select(User)
-        conditions = []
+        return bool(self.find_conflicts(db, username=username, email=email, pubkey=pubkey))
+
+    @timed(DB_QUERY_SECONDS, "find_taken")
+    def find_taken(self, db: Session, *, values: Dict[str, Sequence[str]]) -> Dict[str, Set[str]]:
+        """For each unique field, the subset of the given values that is already registered."""
+        taken = {field: set() for field in values}
+        query = _taken_query(values)
+        if query is not None:
+            for field, value in db.execute(query):
+                taken[field].add(value)
+        return taken
+
+    @timed(DB_QUERY_SECONDS, "insert_ignoring_conflicts")
+    def insert_ignoring_conflicts(self, db: Session, *, rows: List[Dict[str, Any]]) -> Set[str]:
+        """INSERT ... ON CONFLICT DO NOTHING for many users; returns the pubkeys actually inserted.
+
+        Rows must carry every column, created_at and updated_at included: this
+        is a Core insert, so the model's default factories do not run. Does not
+        commit.
+        """
+        if not rows:
+            return set()
+        insert = _UPSERT_INSERTS[db.get_bind().dialect.name]
+        # executemany; SQLAlchemy batches it into multi-row VALUES ... RETURNING statements
+        stmt = insert(User.__table__).on_conflict_do_nothing().returning(User.__table__.c.pubkey)
+        return set(db.execute(stmt, rows).scalars())
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    @timed(DB_QUERY_SECONDS, "get_by_email")
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        if (cached := user_cache.get("email", email)) is not None:
+            return cached
+        return user_cache.put((await db.exec(select(User).where(User.email == email))).first())
+    
+    @timed(DB_QUERY_SECONDS, "get_by_username")
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        if (cached := user_cache.get("username", username)) is not None:
+            return cached
+        return user_cache.put((await db.exec(select(User).where(User.username == username))).first())
+    
+    @timed(DB_QUERY_SECONDS, "get_by_pubkey")
+    async def get_by_pubkey(self, db: AsyncSession, *, pubkey: str) -> Optional[User]:
+        if (cached := user_cache.get("pubkey", pubkey)) is not None:
+            return cached
+        return user_cache.put((await db.exec(select(User).where(User.pubkey == pubkey))).first())
+    
+    @timed(DB_QUERY_SECONDS, "get_multi_by_pubkeys")
+    async def get_multi_by_pubkeys(self, db: AsyncSession, *, pubkeys: List[str]) -> List[User]:
+        return (await db.exec(select(User).where(User.pubkey.in_(pubkeys)))).all()
         
-        if username:
-            conditions.append(User.username == username)
-        if email:
-            conditions.append(User.email == email)
-        if pubkey:
-            conditions.append(User.pubkey == pubkey)
-            
-        if conditions:
-            for condition in conditions:
-                query = query.where(condition)
-                if db.exec(query).first():
-                    return True
-        return False
-
-user = CRUDUser(User)
\ No newline at end of file
+    @timed(DB_QUERY_SECONDS, "find_conflicts")
+    async def find_conflicts(self, db: AsyncSession, *, username: str = None, email: str = None, pubkey: str = None) -> List[str]:
+        """Return which of username/email/pubkey are already taken, in that order."""
+        query = _conflicts_query(username, email, pubkey)
+        if query is None:
+            return []
+        return _ordered_conflicts((await db.execute(query)).all())
+        
+    async def exists_by_fields(self, db: AsyncSession, *, username: str = None, email: str = None, pubkey: str = None) -> bool:
+        return bool(await self.find_conflicts(db, username=username, email=email, pubkey=pubkey))
+
+user = CRUDUser(User, cache=user_cache)
+user_async = AsyncCRUDUser(User, cache=user_cache)
\ No newline at end of file
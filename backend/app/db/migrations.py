@@ -1,19 +1,287 @@
-from sqlalchemy import text
+"""Versioned, online schema migrations.
+
+Each migration is a list of idempotent steps, so a run that dies half way can
+simply be repeated. Applied versions are recorded in schema_version, and a boot
+with nothing to apply costs a single query.
+
+The helpers avoid long exclusive locks on Postgres: columns are added nullable
+and backfilled in bounded batches before NOT NULL is set (through a NOT VALID
+check constraint, so the final ALTER does not scan the table), indexes are
+built with CREATE INDEX CONCURRENTLY, and every DDL statement runs with a
+lock_timeout so it fails rather than stalling the login path behind it.
+
+Workers booting together take turns: one runner at a time holds a Postgres
+advisory lock (or, on SQLite, a lock file next to the database) and re-reads
+the applied version once it has it.
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Sequence
+from loguru import logger
+from sqlalchemy import func, inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from app.core.config import settings
 from app.db.session import engine
+from app.db.models import SchemaVersion
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+Step = Callable[[Engine], None]
+
+# pg_advisory_lock key for the migration runner ("fizk" in ASCII)
+MIGRATION_LOCK_KEY = 0x66697A6B
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+class MigrationError(RuntimeError):
+    pass
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    steps: List[Step]
+
+def _is_postgres(bind: Engine) -> bool:
+    return bind.dialect.name == "postgresql"
+
+def _execute_ddl(bind: Engine, statement: str, concurrently: bool = False) -> None:
+    with bind.connect() as conn:
+        if concurrently:
+            # CONCURRENTLY cannot run inside a transaction block
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        if _is_postgres(bind):
+            scope = "" if concurrently else "LOCAL "
+            conn.execute(text(f"SET {scope}lock_timeout = {int(settings.MIGRATION_LOCK_TIMEOUT_MS)}"))
+            conn.execute(text(f"SET {scope}statement_timeout = 0"))
+        try:
+            conn.execute(text(statement))
+            conn.commit()
+        finally:
+            if concurrently and _is_postgres(bind):
+                conn.execute(text("RESET lock_timeout"))
+                conn.execute(text("RESET statement_timeout"))
+
+def _has_column(bind: Engine, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(bind).get_columns(table)}
+
+def add_column(table: str, column: str, type_sql: str, default_sql: Optional[str] = None,
+               not_null: bool = False, batch_size: Optional[int] = None) -> List[Step]:
+    """Steps that add a column without rewriting or long-locking the table.
+
+    1. ADD COLUMN as nullable, without a default (a catalog-only change)
+    2. SET DEFAULT, so rows inserted from now on get a value
+    3. backfill existing rows in batches, one short transaction each
+    4. SET NOT NULL via a validated CHECK constraint (Postgres only; SQLite
+       cannot alter column constraints)
+    """
+    quoted = f'"{table}"'
+
+    def add_nullable(bind: Engine) -> None:
+        if not _has_column(bind, table, column):
+            _execute_ddl(bind, f"ALTER TABLE {quoted} ADD COLUMN {column} {type_sql}")
+
+    def set_default(bind: Engine) -> None:
+        if _is_postgres(bind):
+            _execute_ddl(bind, f"ALTER TABLE {quoted} ALTER COLUMN {column} SET DEFAULT {default_sql}")
+
+    def backfill(bind: Engine) -> None:
+        size = batch_size or settings.MIGRATION_BATCH_SIZE
+        statement = text(
+            f"UPDATE {quoted} SET {column} = {default_sql} "
+            f"WHERE id IN (SELECT id FROM {quoted} WHERE {column} IS NULL LIMIT {int(size)})"
+        )
+        total = 0
+        while True:
+            with bind.begin() as conn:
+                updated = conn.execute(statement).rowcount
+            total += updated
+            if updated < size:
+                break
+        if total:
+            logger.info(f"Backfilled {total} rows of {table}.{column}")
+
+    def set_not_null(bind: Engine) -> None:
+        if not _is_postgres(bind):
+            logger.debug(f"Skipping NOT NULL on {table}.{column}: not supported by {bind.dialect.name}")
+            return
+        check = f"{table}_{column}_not_null"
+        _execute_ddl(bind, f"ALTER TABLE {quoted} DROP CONSTRAINT IF EXISTS {check}")
+        _execute_ddl(bind, f"ALTER TABLE {quoted} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID")
+        # VALIDATE only takes a SHARE UPDATE EXCLUSIVE lock; SET NOT NULL then trusts the check
+        _execute_ddl(bind, f"ALTER TABLE {quoted} VALIDATE CONSTRAINT {check}")
+        _execute_ddl(bind, f"ALTER TABLE {quoted} ALTER COLUMN {column} SET NOT NULL")
+        _execute_ddl(bind, f"ALTER TABLE {quoted} DROP CONSTRAINT {check}")
 
-def run_migrations():
+    steps = [add_nullable]
+    if default_sql is not None:
+        steps += [set_default, backfill]
+    if not_null:
+        steps.append(set_not_null)
+    return steps
+
+def _check_unique(bind: Engine, table: str, columns: Sequence[str]) -> None:
+    """Raise MigrationError naming the duplicates that would make a unique index build fail."""
+    column_list = ", ".join(columns)
+    with bind.connect() as conn:
+        duplicates = conn.execute(text(
+            f'SELECT {column_list}, COUNT(*) FROM "{table}" GROUP BY {column_list} HAVING COUNT(*) > 1 LIMIT 5'
+        )).all()
+    if duplicates:
+        examples = ", ".join(f"{tuple(row[:-1])!r} x{row[-1]}" for row in duplicates)
+        raise MigrationError(
+            f"Cannot build a unique index on {table}({column_list}): duplicate rows exist, e.g. {examples}. "
+            f"Merge or delete the duplicates, then restart to finish the migration."
+        )
+
+def create_index(name: str, table: str, columns: Sequence[str], unique: bool = False) -> List[Step]:
+    """Steps that build an index without blocking writes (CONCURRENTLY on Postgres).
+
+    A unique index is preceded by a duplicate check, so rows that would break
+    the build are reported by value instead of as a driver error.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    column_list = ", ".join(columns)
+
+    def build(bind: Engine) -> None:
+        if unique:
+            _check_unique(bind, table, columns)
+        if not _is_postgres(bind):
+            _execute_ddl(bind, f'CREATE {kind} IF NOT EXISTS {name} ON "{table}" ({column_list})')
+            return
+        # A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS would accept
+        with bind.connect() as conn:
+            invalid = conn.execute(text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ), {"name": name}).first()
+        if invalid:
+            logger.warning(f"Dropping invalid index {name} left by an earlier build")
+            _execute_ddl(bind, f"DROP INDEX CONCURRENTLY IF EXISTS {name}", concurrently=True)
+        _execute_ddl(bind, f'CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON "{table}" ({column_list})', concurrently=True)
+
+    return [build]
+
+def normalize_column(table: str, column: str, expression_sql: str, batch_size: Optional[int] = None) -> List[Step]:
+    """Steps that rewrite column to expression_sql (e.g. LOWER(column)) in batches, one short transaction each.
+
+    Rows whose new value would collide with another row under a unique index
+    are reported by value instead of as a driver error.
+    """
+    quoted = f'"{table}"'
+
+    def rewrite(bind: Engine) -> None:
+        size = batch_size or settings.MIGRATION_BATCH_SIZE
+        statement = text(
+            f"UPDATE {quoted} SET {column} = {expression_sql} "
+            f"WHERE id IN (SELECT id FROM {quoted} WHERE {column} <> {expression_sql} LIMIT {int(size)})"
+        )
+        total = 0
+        while True:
+            try:
+                with bind.begin() as conn:
+                    updated = conn.execute(statement).rowcount
+            except IntegrityError as e:
+                raise MigrationError(
+                    f"Cannot rewrite {table}.{column} as {expression_sql}: rows would collide ({e.orig}). "
+                    f"Merge or delete the duplicates, then restart to finish the migration."
+                ) from None
+            total += updated
+            if updated < size:
+                break
+        if total:
+            logger.info(f"Rewrote {total} rows of {table}.{column} as {expression_sql}")
+
+    return [rewrite]
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "user.updated_at", add_column(
+        "user", "updated_at", "TIMESTAMP WITH TIME ZONE", default_sql="CURRENT_TIMESTAMP", not_null=True
+    )),
+    # Insert-first signup relies on these; tables created before the models declared them lack them
+    Migration(2, "unique indexes on user", [
+        *create_index("ix_user_username", "user", ["username"], unique=True),
+        *create_index("ix_user_email", "user", ["email"], unique=True),
+        *create_index("ix_user_pubkey", "user", ["pubkey"], unique=True),
+    ]),
+    # Request schemas now hand over lowercase hex; keys stored before kept the client's case
+    Migration(3, "lowercase user.pubkey", normalize_column("user", "pubkey", "LOWER(pubkey)")),
+]
+
+SCHEMA_VERSION = max(migration.version for migration in MIGRATIONS)
+
+def current_version(conn: Connection) -> Optional[int]:
+    """Highest applied schema version, or None if the version table does not exist yet."""
+    try:
+        return conn.execute(select(func.max(SchemaVersion.version))).scalar()
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return None
+
+def schema_is_current() -> bool:
     with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name='user' AND column_name='updated_at'
-        """))
+        return current_version(conn) == SCHEMA_VERSION
+
+@contextmanager
+def migration_lock(bind: Engine) -> Iterator[None]:
+    """Hold the lock that lets one migration runner at a time proceed."""
+    if _is_postgres(bind):
+        # Autocommit, and try-lock polling rather than a blocking pg_advisory_lock: a waiter
+        # stuck in a statement holds a snapshot, which CREATE INDEX CONCURRENTLY would wait on
+        with bind.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            query = text("SELECT pg_try_advisory_lock(:key)")
+            waiting = False
+            while not conn.execute(query, {"key": MIGRATION_LOCK_KEY}).scalar():
+                if not waiting:
+                    logger.info("Waiting for another worker to finish migrations")
+                    waiting = True
+                time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        return
+
+    database = bind.url.database
+    if bind.dialect.name != "sqlite" or not database or database == ":memory:" or fcntl is None:
+        yield
+        return
+    # SQLite is always on this host, so a lock file beside it serialises the workers
+    with open(f"{database}.migrate.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def run_migrations(bind: Engine = engine) -> bool:
+    """Apply every migration newer than the recorded version; True if any ran."""
+    with bind.connect() as conn:
+        if (current_version(conn) or 0) >= SCHEMA_VERSION:
+            return False
+    
+    with migration_lock(bind):
+        # Another worker may have applied some or all of them while this one waited
+        with bind.connect() as conn:
+            applied = current_version(conn) or 0
+        pending = [migration for migration in MIGRATIONS if migration.version > applied]
         
-        if not result.fetchone():
-            conn.execute(text("""
-                ALTER TABLE "user" ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE 
-                DEFAULT CURRENT_TIMESTAMP NOT NULL
-            """))
-            conn.commit()
-            return True
-    return False
\ No newline at end of file
+        for migration in sorted(pending, key=lambda m: m.version):
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            start = time.perf_counter()
+            for step in migration.steps:
+                step(bind)
+            try:
+                with bind.begin() as conn:
+                    conn.execute(insert(SchemaVersion).values(version=migration.version, applied_at=time.time()))
+            except IntegrityError:
+                # Recorded by a runner that did not take the lock (e.g. an older release)
+                logger.info(f"Migration {migration.version} was already recorded")
+                continue
+            logger.info(f"Migration {migration.version} done in {time.perf_counter() - start:.2f}s")
+    return bool(pending)
\ No newline at end of file
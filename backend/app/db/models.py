@@ -18,4 +18,17 @@ class User(SQLModel, table=True):
     updated_at: Optional[datetime] = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(TIMESTAMP(timezone=True), nullable=False)
-    )
\ No newline at end of file
+    )
+
+class SchemaVersion(SQLModel, table=True):
+    __tablename__ = "schema_version"
+
+    version: int = Field(primary_key=True)
+    applied_at: float
+
+class Challenge(SQLModel, table=True):
+    __tablename__ = "auth_challenge"
+
+    pubkey: str = Field(primary_key=True, max_length=66)
+    challenge: str = Field(max_length=64)
+    issued_at: float = Field(index=True)
\ No newline at end of file
@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Any, Dict, Type
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from app.core.config import settings
+
+class PoolMetrics:
+    """Connection pool counters for one engine, fed by pool events and a timed pool class."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.engine: Engine = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self.timeouts = 0
+        self.acquires = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+
+    def record_acquire(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.acquires += 1
+            self.acquire_seconds_total += seconds
+            self.acquire_seconds_max = max(self.acquire_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _incr(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def attach(self, engine: Engine) -> None:
+        self.engine = engine
+        event.listen(engine, "connect", lambda *_: self._incr("connects"))
+        event.listen(engine, "checkout", lambda *_: self._incr("checkouts"))
+        event.listen(engine, "checkin", lambda *_: self._incr("checkins"))
+        event.listen(engine, "invalidate", lambda *_: self._incr("invalidations"))
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        if getattr(context, "is_pre_ping", False):
+            self._incr("pre_ping_failures")
+            logger.warning(f"Pre-ping failed on {self.name} pool: {context.original_exception}")
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            stats = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "pre_ping_failures": self.pre_ping_failures,
+                "timeouts": self.timeouts,
+                "avg_acquire_ms": round(self.acquire_seconds_total / self.acquires * 1000, 3) if self.acquires else 0.0,
+                "max_acquire_ms": round(self.acquire_seconds_max * 1000, 3),
+            }
+        for name in ("size", "checkedout", "checkedin", "overflow"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                stats[name] = method()
+        return stats
+
+def _timed_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    # A per-engine subclass, so Pool.recreate() (which uses self.__class__) keeps the metrics
+    class TimedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                conn = super().connect()
+            except PoolTimeoutError:
+                metrics.record_acquire(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record_acquire(time.perf_counter() - start)
+            return conn
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+def engine_options(url: str, metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine built from the DB_* settings."""
+    options: Dict[str, Any] = {"echo": settings.SQL_ECHO, "pool_pre_ping": True}
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite picks its own pool class; sizing and timeouts do not apply
+        return options
+
+    options.update(
+        poolclass=_timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {"sync": sync_pool_metrics.stats(), "async": async_pool_metrics.stats()}
\ No newline at end of file
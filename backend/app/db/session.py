@@ -1,22 +1,31 @@
+from typing import AsyncIterator, Optional
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from loguru import logger
 from app.core.config import settings
+from app.db.pool import engine_options, sync_pool_metrics, async_pool_metrics
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL, 
-    echo=settings.DEBUG,
-    pool_pre_ping=True
-)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, sync_pool_metrics))
+sync_pool_metrics.attach(engine)
 
 def init_db() -> None:
     logger.info("Initializing database...")
     try:
-        SQLModel.metadata.create_all(engine)
+        from app.db.migrations import schema_is_current, run_migrations, migration_lock
+        if schema_is_current():
+            # Skips create_all too, which probes the catalog once per table
+            logger.info("Database schema is current, nothing to do")
+            return
+        
+        # Workers booting together would otherwise race on CREATE TABLE
+        with migration_lock(engine):
+            SQLModel.metadata.create_all(engine)
         logger.success("Database tables created successfully!")
         
         # Run migrations for existing tables
-        from app.db.migrations import run_migrations
         if run_migrations():
             logger.info("Database migrations applied successfully!")
             
@@ -26,4 +35,35 @@ def init_db() -> None:
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+_async_engine: Optional[AsyncEngine] = None
+
+def get_async_engine() -> AsyncEngine:
+    # Created on first use so the sync-only code paths never import asyncpg/aiosqlite
+    global _async_engine
+    if _async_engine is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, async_pool_metrics, is_async=True))
+        async_pool_metrics.attach(_async_engine.sync_engine)
+    return _async_engine
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
\ No newline at end of file
@@ -1,69 +1,78 @@
-import re
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from app.core.config import settings
+from app.schemas.types import Email, Pubkey, Point, Hex32, Challenge, Signature64
 
 class ChallengeRequest(BaseModel):
-    pubkey: str
-    
-    @field_validator('pubkey')
-    @classmethod
-    def validate_pubkey(cls, v):
-        if not re.match(r'^(02|03)[0-9a-fA-F]{64}$', v):
-            raise ValueError("Invalid public key format")
-        return v
+    pubkey: Pubkey
 
 class ChallengeResponse(BaseModel):
     challengeHex: str
 
 class LoginRequest(BaseModel):
-    pubkey: str
+    pubkey: Pubkey
     signature_der: str
-    challengeHex: str
-    
-    @field_validator('pubkey')
-    @classmethod
-    def validate_pubkey(cls, v):
-        if not re.match(r'^(02|03)[0-9a-fA-F]{64}$', v):
-            raise ValueError("Invalid public key format")
-        return v
-    
-    @field_validator('challengeHex')
-    @classmethod
-    def validate_challenge(cls, v):
-        if not re.match(r'^[0-9a-fA-F]{64}$', v):
-            raise ValueError("Invalid challenge format")
-        return v
+    challengeHex: Hex32
 
 class LoginResponse(BaseModel):
     success: bool
     message: str
     username: Optional[str] = None
+    # Bearer token for protected endpoints, so they need no further challenge round-trip
+    session_token: Optional[str] = None
+    expires_at: Optional[int] = None
+
+class LogoutResponse(BaseModel):
+    success: bool
+    message: str
 
 class SignupRequest(BaseModel):
     username: str = Field(min_length=3, max_length=100)
-    email: EmailStr
+    email: Email
     hashed_password: str
-    pubkey: str
-    
-    @field_validator('pubkey')
-    @classmethod
-    def validate_pubkey(cls, v):
-        if not re.match(r'^(02|03)[0-9a-fA-F]{64}$', v):
-            raise ValueError("Invalid public key format")
-        return v
+    pubkey: Pubkey
 
 class SignupResponse(BaseModel):
     success: bool
     message: str
 
+class BulkSignupRequest(BaseModel):
+    # Rows are validated one by one, so a bad row is reported instead of failing the request
+    users: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.BULK_SIGNUP_MAX_ITEMS)
+
+class BulkSignupResult(BaseModel):
+    row: int
+    status: Literal["created", "invalid", "duplicate", "conflict"]
+    username: Optional[str] = None
+    detail: Optional[str] = None
+
+class BulkSignupResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkSignupResult]
+
 class MnemonicResponse(BaseModel):
     mnemonics: List[str]
 
 class SchnorrLoginRequest(BaseModel):
-    pubkey: str
-    challengeHex: str
-    R_hex: str = Field(..., description="Schnorr commitment (R point)")
-    s_hex: str = Field(..., description="Schnorr response (s value)")
+    pubkey: Pubkey
+    challengeHex: Challenge
+    R_hex: Optional[Point] = Field(None, description="Schnorr commitment (R point)")
+    s_hex: Optional[Hex32] = Field(None, description="Schnorr response (s value)")
+    signature_hex: Optional[Signature64] = Field(None, description="BIP-340 signature over the challenge; replaces R_hex and s_hex")
+    
+    @model_validator(mode='after')
+    def validate_proof(self):
+        if self.signature_hex is None and (self.R_hex is None or self.s_hex is None):
+            raise ValueError("Either signature_hex or both R_hex and s_hex are required")
+        return self
+
+class BatchLoginRequest(BaseModel):
+    # Checked on the raw list, before any item is validated
+    items: List[SchnorrLoginRequest] = Field(..., min_length=1, max_length=settings.LOGIN_BATCH_MAX_ITEMS)
+
+class BatchLoginResponse(BaseModel):
+    results: List[LoginResponse]
 
 class ResolveUserRequest(BaseModel):
     identifier: str
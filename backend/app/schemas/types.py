@@ -0,0 +1,72 @@
+import re
+from functools import lru_cache
+from typing import Annotated
+from pydantic import AfterValidator, WithJsonSchema
+from pydantic.networks import validate_email
+from app.core.encoding import HexBytes, binary_decoder
+
+_decode_33 = binary_decoder((33,))
+_decode_32 = binary_decoder((32,))
+# 32-byte random challenges, or 56-byte signed ones from the stateless backend
+_decode_challenge = binary_decoder((32, 56))
+_decode_64 = binary_decoder((64,))
+
+def _pubkey(v: str) -> HexBytes:
+    try:
+        decoded = _decode_33(v)
+        if decoded.raw[0] in (2, 3):
+            return decoded
+    except ValueError:
+        pass
+    raise ValueError("Invalid public key format")
+
+def _point(v: str) -> HexBytes:
+    try:
+        return _decode_33(v)
+    except ValueError:
+        raise ValueError("Invalid point format") from None
+
+def _hex32(v: str) -> HexBytes:
+    try:
+        return _decode_32(v)
+    except ValueError:
+        raise ValueError("Invalid 32-byte value") from None
+
+def _challenge(v: str) -> HexBytes:
+    try:
+        return _decode_challenge(v)
+    except ValueError:
+        raise ValueError("Invalid challenge format") from None
+
+def _signature64(v: str) -> HexBytes:
+    try:
+        return _decode_64(v)
+    except ValueError:
+        raise ValueError("Invalid signature format") from None
+
+# ASCII dot-atom local parts, which email-validator accepts and returns unchanged
+_DOT_ATOM = re.compile(r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*")
+
+@lru_cache(maxsize=4096)
+def _normalized_domain(domain: str) -> str:
+    # Full validation with a placeholder local part; raises for an invalid domain
+    return validate_email(f"a@{domain}")[1][2:]
+
+def _email(v: str) -> str:
+    """Same result as EmailStr, but the expensive IDNA domain checks run once per domain."""
+    local, at, domain = v.rpartition("@")
+    if at and len(local) <= 64 and _DOT_ATOM.fullmatch(local):
+        email = f"{local}@{_normalized_domain(domain)}"
+        if len(email) <= 254:
+            return email
+    return validate_email(v)[1]
+
+# Compressed secp256k1 public key: 02/03 prefix + 32-byte x
+Pubkey = Annotated[str, AfterValidator(_pubkey)]
+# Compressed curve point without the prefix check (e.g. a Schnorr commitment R)
+Point = Annotated[str, AfterValidator(_point)]
+Hex32 = Annotated[str, AfterValidator(_hex32)]
+Challenge = Annotated[str, AfterValidator(_challenge)]
+Signature64 = Annotated[str, AfterValidator(_signature64)]
+# Drop-in for EmailStr, down to the OpenAPI schema
+Email = Annotated[str, AfterValidator(_email), WithJsonSchema({"type": "string", "format": "email"})]
\ No newline at end of file
@@ -1,26 +1,19 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-import re
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from typing import Optional
+from app.schemas.types import Email, Pubkey
 
 class UserBase(BaseModel):
     username: str = Field(min_length=3, max_length=100)
-    email: EmailStr
+    email: Email
 
 class UserCreate(UserBase):
     hashed_password: str
-    pubkey: str
-    
-    @field_validator('pubkey')
-    @classmethod
-    def validate_pubkey(cls, v):
-        if not re.match(r'^(02|03)[0-9a-fA-F]{64}$', v):
-            raise ValueError("Invalid public key format. Must start with '02' or '03' followed by 64 hex characters")
-        return v
+    pubkey: Pubkey
 
 class UserUpdate(BaseModel):
     username: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     
     @field_validator('username')
     @classmethod
@@ -1,10 +1,36 @@
-import time
 from loguru import logger
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db.models import User
-from app.core.security import challenge_store, schnorr_verify_response, generate_challenge
+from app.core.security import (
+    challenge_store, schnorr_prepare_proof, schnorr_encode_proofs,
+    schnorr_verify_many_encoded_timed, record_verification, SchnorrBatchVerifier, SchnorrProof
+)
+from app.core.metrics import CHALLENGES_ISSUED
 from app.core.config import settings
-from typing import Optional, Tuple
+from app.core.executors import run_db, run_verify
+from app.db.crud.users import user_cache
+from typing import List, Optional, Tuple
+
+# (pubkey, challenge, R, s, BIP-340 signature); either R and s or the signature is set
+LoginAttempt = Tuple[str, str, Optional[str], Optional[str], Optional[str]]
+
+async def _verify_off_loop(proofs: List[SchnorrProof]) -> List[bool]:
+    results, seconds = await run_verify(schnorr_verify_many_encoded_timed, schnorr_encode_proofs(proofs))
+    record_verification(results, seconds)
+    return results
+
+login_batcher = SchnorrBatchVerifier(
+    max_batch_size=settings.LOGIN_BATCH_MAX_SIZE,
+    max_delay=settings.LOGIN_BATCH_MAX_DELAY_MS / 1000,
+    runner=_verify_off_loop
+)
+
+async def _run_store(fn, *args):
+    # Challenge store calls are cheap in memory but a DB round-trip for the SQL backend
+    if challenge_store.blocking:
+        return await run_db(fn, *args)
+    return fn(*args)
 
 class AuthService:
     @staticmethod
@@ -20,6 +46,25 @@ class AuthService:
         session.add(new_user)
         session.commit()
         session.refresh(new_user)
+        user_cache.invalidate(new_user)
+        
+        logger.info(f"User account created for: {username}, ID: {new_user.id}")
+        return new_user
+
+    @staticmethod
+    async def create_user_async(session: AsyncSession, username: str, email: str, hashed_password: str, pubkey: str) -> User:
+        logger.info(f"Creating new user account for: {username}, public key: {pubkey[:10]}...")
+        
+        new_user = User(
+            username=username,
+            email=email,
+            hashed_password=hashed_password,
+            pubkey=pubkey
+        )
+        session.add(new_user)
+        await session.commit()
+        await session.refresh(new_user)
+        user_cache.invalidate(new_user)
         
         logger.info(f"User account created for: {username}, ID: {new_user.id}")
         return new_user
@@ -28,28 +73,60 @@ class AuthService:
     def get_user_by_pubkey(session: Session, pubkey: str) -> Optional[User]:
         user = session.exec(select(User).where(User.pubkey == pubkey)).first()
         if user:
-            logger.debug(f"Found user with pubkey {pubkey[:10]}...: {user.username}")
+            logger.debug("Found user with pubkey {}...: {}", pubkey[:10], user.username)
         else:
-            logger.debug(f"No user found with pubkey {pubkey[:10]}...")
+            logger.debug("No user found with pubkey {}...", pubkey[:10])
         return user
     
     @staticmethod
     def create_challenge(pubkey: str) -> str:
-        logger.info(f"Creating challenge for pubkey: {pubkey[:10]}...")
-        challenge = generate_challenge()
-        challenge_store[pubkey] = (challenge, time.time(), None)
-        logger.info(f"Challenge created: {challenge[:16]}...")
+        logger.debug("Creating challenge for pubkey: {}...", pubkey[:10])
+        challenge = challenge_store.issue(pubkey)
+        CHALLENGES_ISSUED.inc()
+        logger.debug("Challenge created: {}...", challenge[:16])
         return challenge
+
+    @staticmethod
+    async def create_challenge_async(pubkey: str) -> str:
+        return await _run_store(AuthService.create_challenge, pubkey)
         
     @staticmethod
-    def verify_login(pubkey: str, challenge_hex: str, R_hex: str, s_hex: str) -> Tuple[bool, Optional[str]]:
-        logger.info(f"Verifying Schnorr ZKP login for pubkey: {pubkey[:10]}...")
+    async def verify_login(pubkey: str, challenge_hex: str, R_hex: Optional[str], s_hex: Optional[str],
+                           signature_hex: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        logger.debug("Verifying Schnorr ZKP login for pubkey: {}...", pubkey[:10])
         
-        success, error_msg = schnorr_verify_response(pubkey, challenge_hex, R_hex, s_hex)
+        proof, error_msg = await _run_store(schnorr_prepare_proof, pubkey, challenge_hex, R_hex, s_hex, signature_hex)
+        success = proof is not None and await login_batcher.verify(proof)
         
         if success:
-            logger.info(f"Login successful for pubkey: {pubkey[:10]}...")
+            logger.debug("Login successful for pubkey: {}...", pubkey[:10])
         else:
             logger.warning(f"Login failed for pubkey: {pubkey[:10]}... Reason: {error_msg}")
         
-        return success, error_msg
\ No newline at end of file
+        return success, error_msg
+
+    @staticmethod
+    def _prepare_batch(attempts: List[LoginAttempt]) -> Tuple[List[Tuple[bool, Optional[str]]], List[int], List[SchnorrProof]]:
+        results: List[Tuple[bool, Optional[str]]] = []
+        proofs = []
+        proof_indexes = []
+        for attempt in attempts:
+            proof, error_msg = schnorr_prepare_proof(*attempt)
+            if proof is not None:
+                proof_indexes.append(len(results))
+                proofs.append(proof)
+            results.append((False, error_msg))
+        return results, proof_indexes, proofs
+
+    @staticmethod
+    async def verify_login_batch(attempts: List[LoginAttempt]) -> List[Tuple[bool, Optional[str]]]:
+        logger.info(f"Verifying batch of {len(attempts)} Schnorr ZKP logins")
+        
+        results, proof_indexes, proofs = await _run_store(AuthService._prepare_batch, attempts)
+        verified = await _verify_off_loop(proofs) if proofs else []
+        
+        for index, valid in zip(proof_indexes, verified):
+            results[index] = (valid, None)
+        
+        logger.info(f"Batch login verified: {sum(ok for ok, _ in results)}/{len(results)} successful")
+        return results
\ No newline at end of file
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from loguru import logger
+from pydantic import ValidationError
+from sqlmodel import Session
+from app.core.config import settings
+from app.db.crud.users import CONFLICT_LABELS, UNIQUE_FIELDS, user as user_crud
+from app.schemas.auth import BulkSignupResult, SignupRequest
+
+def _validation_detail(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+def _username(raw: Any) -> Optional[str]:
+    username = raw.get("username") if isinstance(raw, dict) else None
+    return username if isinstance(username, str) else None
+
+def _import_chunk(session: Session, chunk: List[Any], offset: int,
+                  seen: Dict[str, set]) -> List[BulkSignupResult]:
+    results: List[BulkSignupResult] = [None] * len(chunk)
+    valid: List[Tuple[int, SignupRequest]] = []
+    for i, raw in enumerate(chunk):
+        try:
+            req = SignupRequest.model_validate(raw)
+        except ValidationError as e:
+            results[i] = BulkSignupResult(row=offset + i, status="invalid", username=_username(raw),
+                                          detail=_validation_detail(e))
+            continue
+        repeated = next((field for field in UNIQUE_FIELDS if getattr(req, field) in seen[field]), None)
+        if repeated:
+            results[i] = BulkSignupResult(row=offset + i, status="duplicate", username=req.username,
+                                          detail=f"{CONFLICT_LABELS[repeated]} appears earlier in this import")
+            continue
+        for field in UNIQUE_FIELDS:
+            seen[field].add(getattr(req, field))
+        valid.append((i, req))
+
+    taken = user_crud.find_taken(session, values={
+        field: [getattr(req, field) for _, req in valid] for field in UNIQUE_FIELDS
+    })
+    pending: List[Tuple[int, SignupRequest]] = []
+    for i, req in valid:
+        conflict = next((field for field in UNIQUE_FIELDS if getattr(req, field) in taken[field]), None)
+        if conflict:
+            results[i] = BulkSignupResult(row=offset + i, status="conflict", username=req.username,
+                                          detail=f"{CONFLICT_LABELS[conflict]} already registered")
+        else:
+            pending.append((i, req))
+
+    now = datetime.now(timezone.utc)
+    inserted = user_crud.insert_ignoring_conflicts(session, rows=[{
+        "username": req.username,
+        "email": req.email,
+        "hashed_password": req.hashed_password,
+        "pubkey": req.pubkey,
+        "created_at": now,
+        "updated_at": now,
+    } for _, req in pending])
+    session.commit()
+
+    for i, req in pending:
+        if req.pubkey in inserted:
+            results[i] = BulkSignupResult(row=offset + i, status="created", username=req.username)
+        else:
+            # Registered concurrently, between the uniqueness query and the insert
+            results[i] = BulkSignupResult(row=offset + i, status="conflict", username=req.username,
+                                          detail="Already registered")
+    return results
+
+def import_users(session: Session, rows: Iterable[Any], chunk_size: Optional[int] = None) -> Iterator[BulkSignupResult]:
+    """Validate and insert users chunk by chunk, yielding one result per input row, in order.
+
+    Each chunk costs one uniqueness query and one batched INSERT ... ON CONFLICT
+    DO NOTHING, and is committed on its own: rows already reported as created
+    stay created if a later chunk fails.
+    """
+    chunk_size = chunk_size or settings.BULK_SIGNUP_CHUNK_SIZE
+    seen = {field: set() for field in UNIQUE_FIELDS}
+    rows = iter(rows)
+    offset = 0
+    while chunk := list(islice(rows, chunk_size)):
+        results = _import_chunk(session, chunk, offset, seen)
+        created = sum(result.status == "created" for result in results)
+        logger.debug(f"Bulk signup rows {offset}-{offset + len(chunk) - 1}: {created} created")
+        yield from results
+        offset += len(chunk)
\ No newline at end of file
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, List, Optional
+from loguru import logger
+from app.core.config import settings
+
+class MnemonicPool:
+    """Pre-generated BIP-39 phrases for the signup page.
+
+    take() pops from a deque, so serving is O(1). When the pool drops below
+    low_watermark a background task tops it up to size in a worker thread. If
+    it runs dry anyway the missing phrases are generated inline. Every phrase
+    is handed out at most once.
+
+    The pool starts empty and is first filled after the first take(), so a
+    worker that never serves the signup page never loads the wordlist.
+    """
+
+    def __init__(self, size: int, low_watermark: int, strength: int = 128, language: str = "english"):
+        self.size = size
+        self.low_watermark = low_watermark
+        self.strength = strength
+        self.language = language
+        self._phrases: Deque[str] = deque()
+        self._generator = None
+        self._generator_lock = threading.Lock()
+        self._refill_needed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.served = 0
+        self.generated_inline = 0
+
+    @property
+    def generator(self):
+        # One wordlist per process, loaded on first use rather than at import
+        if self._generator is None:
+            with self._generator_lock:
+                if self._generator is None:
+                    from mnemonic import Mnemonic
+                    self._generator = Mnemonic(self.language)
+        return self._generator
+
+    def generate(self) -> str:
+        return self.generator.generate(strength=self.strength)
+
+    def fill(self) -> int:
+        added = 0
+        while len(self._phrases) < self.size:
+            self._phrases.append(self.generate())
+            added += 1
+        return added
+
+    def take(self, count: int) -> List[str]:
+        phrases = []
+        while len(phrases) < count:
+            try:
+                phrases.append(self._phrases.popleft())
+            except IndexError:
+                phrases.append(self.generate())
+                self.generated_inline += 1
+        self.served += count
+        if len(self._phrases) < self.low_watermark and self._refill_needed is not None:
+            self._refill_needed.set()
+        return phrases
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            try:
+                added = await asyncio.to_thread(self.fill)
+                logger.debug(f"Refilled mnemonic pool with {added} phrases")
+            except Exception as e:
+                logger.error(f"Mnemonic pool refill failed: {e}")
+
+    def start(self) -> None:
+        """Start the refill task on the running loop; it idles until take() asks for phrases."""
+        self._refill_needed = asyncio.Event()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._refill_needed = None
+
+    def stats(self) -> dict:
+        return {
+            "available": len(self._phrases),
+            "size": self.size,
+            "low_watermark": self.low_watermark,
+            "served": self.served,
+            "generated_inline": self.generated_inline,
+        }
+
+mnemonic_pool = MnemonicPool(size=settings.MNEMONIC_POOL_SIZE, low_watermark=settings.MNEMONIC_POOL_LOW_WATERMARK)
\ No newline at end of file
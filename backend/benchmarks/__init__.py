@@ -0,0 +1 @@
+"""Performance benchmarks for the backend."""
\ No newline at end of file
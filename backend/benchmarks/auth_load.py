@@ -0,0 +1,236 @@
+"""Load-test the signup and challenge -> login flow of the auth API.
+
+Drives the FastAPI app in-process through ASGI (no network, the app's own
+lifespan runs against --database-url), or a running server over HTTP with --url.
+Every synthetic user has a real secp256k1 key, so logins carry valid proofs.
+All traffic comes from one client address, so the in-process app runs with the
+rate limits raised; start a server under test with them raised as well, e.g.
+RATE_LIMIT_IP_RATE=1e9 RATE_LIMIT_IP_BURST=1000000000 RATE_LIMIT_PUBKEY_RATE=1e9.
+
+Needs requirements-dev.txt. Run from the backend directory:
+
+    python -m benchmarks.auth_load --scenario login --users 2000 --requests 5000 --concurrency 64
+    python -m benchmarks.auth_load --scenario mixed --url http://localhost:8080
+    python -m benchmarks.auth_load --scenario login --out-dir ../benchmarks
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import secrets
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import coincurve
+import httpx
+
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+SCENARIOS = ("signup", "login", "mixed")
+
+@dataclass
+class Identity:
+    key: coincurve.PrivateKey
+    pubkey: str
+    username: str
+    email: str
+
+def make_identities(count: int, run_id: str) -> List[Identity]:
+    identities = []
+    for i in range(count):
+        key = coincurve.PrivateKey()
+        username = f"load_{run_id}_{i}"
+        identities.append(Identity(key, key.public_key.format().hex(), username, f"{username}@example.com"))
+    return identities
+
+def prove(identity: Identity, challenge_hex: str, bip340: bool) -> dict:
+    """Login body for a challenge, matching schnorr_prepare_proof."""
+    if bip340:
+        return {"signature_hex": identity.key.sign_schnorr(bytes.fromhex(challenge_hex)).hex()}
+    nonce = coincurve.PrivateKey()
+    R = nonce.public_key.format()
+    P = identity.key.public_key.format()
+    e = int.from_bytes(hashlib.sha256(R + P + bytes.fromhex(challenge_hex)).digest(), "big") % SECP256K1_ORDER
+    s = (nonce.to_int() + e * identity.key.to_int()) % SECP256K1_ORDER
+    return {"R_hex": R.hex(), "s_hex": s.to_bytes(32, "big").hex()}
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, path: str, body: dict, expected: int = 200) -> Optional[dict]:
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=body)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code != expected:
+            self.errors[name] += 1
+            return None
+        return response.json()
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def summarize(recorder: Recorder, wall: float) -> Dict[str, dict]:
+    summary = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        ordered = sorted(recorder.latencies[name])
+        summary[name] = {
+            "requests": len(ordered),
+            "errors": recorder.errors[name],
+            "rps": round(len(ordered) / wall, 1) if wall else 0.0,
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+        }
+    return summary
+
+async def _signup(client: httpx.AsyncClient, recorder: Recorder, identity: Identity) -> None:
+    await recorder.call(client, "signup", "/api/auth/signup", {
+        "username": identity.username,
+        "email": identity.email,
+        "hashed_password": secrets.token_hex(32),
+        "pubkey": identity.pubkey,
+    }, expected=201)
+
+async def _login(client: httpx.AsyncClient, recorder: Recorder, identity: Identity, bip340: bool) -> None:
+    start = time.perf_counter()
+    challenge = await recorder.call(client, "challenge", "/api/auth/challenge", {"pubkey": identity.pubkey})
+    if challenge is None:
+        recorder.errors["login_flow"] += 1
+        return
+    body = {"pubkey": identity.pubkey, "challengeHex": challenge["challengeHex"]}
+    body.update(prove(identity, challenge["challengeHex"], bip340))
+    if await recorder.call(client, "login", "/api/auth/login", body) is None:
+        recorder.errors["login_flow"] += 1
+        return
+    recorder.latencies["login_flow"].append(time.perf_counter() - start)
+
+async def _run_ops(ops, concurrency: int) -> float:
+    queue: asyncio.Queue = asyncio.Queue()
+    for op in ops:
+        queue.put_nowait(op)
+
+    async def worker():
+        while not queue.empty():
+            await queue.get_nowait()()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+async def run(scenario: str, users: int, requests: int, concurrency: int, url: Optional[str],
+              signup_ratio: float, bip340: bool) -> dict:
+    if scenario != "signup" and users < concurrency:
+        raise SystemExit("--users must be at least --concurrency, each user can only have one open challenge")
+    run_id = secrets.token_hex(4)
+    identities = make_identities(users, run_id)
+    fresh = make_identities(requests, run_id + "n") if scenario != "login" else []
+
+    async with AsyncExitStack() as stack:
+        if url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=url, timeout=30.0))
+        else:
+            from main import app
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url="http://loadtest"))
+
+        recorder = Recorder()
+        if scenario != "signup":
+            # Seed the users that log in; not part of the measurement
+            await _run_ops([lambda i=i: _signup(client, Recorder(), i) for i in identities], concurrency)
+
+        rng = random.Random(run_id)
+        ops = []
+        for n in range(requests):
+            if scenario == "signup" or (scenario == "mixed" and rng.random() < signup_ratio):
+                ops.append(lambda i=fresh[n]: _signup(client, recorder, i))
+            else:
+                # Round-robin: a user holds one challenge at a time, so concurrent flows need distinct users
+                ops.append(lambda i=identities[n % len(identities)]: _login(client, recorder, i, bip340))
+        wall = await _run_ops(ops, concurrency)
+
+    return {
+        "scenario": scenario,
+        "target": url or "asgi",
+        "proof": "bip340" if bip340 else "commitment",
+        "users": users,
+        "operations": requests,
+        "concurrency": concurrency,
+        "seconds": round(wall, 3),
+        "ops_per_sec": round(requests / wall, 1),
+        "endpoints": summarize(recorder, wall),
+    }
+
+def format_summary(result: dict) -> str:
+    lines = [
+        f"scenario={result['scenario']} target={result['target']} proof={result['proof']} "
+        f"concurrency={result['concurrency']} ops={result['operations']} "
+        f"in {result['seconds']}s ({result['ops_per_sec']:,.1f} ops/s)",
+        f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for name, stats in result["endpoints"].items():
+        lines.append(f"{name:<12} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>9,.1f} "
+                     f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="login")
+    parser.add_argument("--users", type=int, default=1000, help="pre-registered users that log in")
+    parser.add_argument("--requests", type=int, default=2000, help="signups or challenge+login flows to run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--signup-ratio", type=float, default=0.1, help="share of signups in the mixed scenario")
+    parser.add_argument("--bip340", action="store_true", help="log in with BIP-340 signatures")
+    parser.add_argument("--url", default=None, help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--database-url", default=None, help="in-process only; defaults to a temporary SQLite file")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    # Not benchmark_*: the FL dashboards load the newest benchmark_*_client_*.json and benchmark_summary_*.txt
+    parser.add_argument("--out-dir", default=None, help="also write auth_load_*.json and auth_load_summary_*.txt here")
+    args = parser.parse_args()
+
+    if not args.url:
+        # Settings are read when the app is imported, so set them first
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+        os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+        os.environ.setdefault("LOG_FILE_LEVEL", "WARNING")
+        # Every simulated user shares one client address in-process, and small --users
+        # counts reuse each pubkey many times; keep the limiter on but out of the way
+        os.environ.setdefault("RATE_LIMIT_IP_RATE", "1e9")
+        os.environ.setdefault("RATE_LIMIT_IP_BURST", "1000000000")
+        os.environ.setdefault("RATE_LIMIT_PUBKEY_RATE", "1e9")
+        os.environ.setdefault("RATE_LIMIT_PUBKEY_BURST", "1000000000")
+
+    started = datetime.now()
+    result = asyncio.run(run(args.scenario, args.users, args.requests, args.concurrency, args.url,
+                             args.signup_ratio, args.bip340))
+    summary = format_summary(result)
+    print(summary)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        stamp = started.strftime("%Y%m%d_%H%M%S")
+        with open(os.path.join(args.out_dir, f"auth_load_{stamp}.json"), "w") as f:
+            json.dump({"start_time": started.isoformat(timespec="seconds"), **result}, f, indent=2)
+        with open(os.path.join(args.out_dir, f"auth_load_summary_{stamp}.txt"), "w") as f:
+            f.write(summary + "\n")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
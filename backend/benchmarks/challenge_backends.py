@@ -0,0 +1,87 @@
+"""Compare issue/redeem throughput of the challenge store backends.
+
+Run from the backend directory:
+
+    python -m benchmarks.challenge_backends --ops 20000 --processes 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import secrets
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlmodel import SQLModel
+
+from app.core.challenges import ChallengeStore, MmapChallengeStore, SQLChallengeStore, StatelessChallengeStore
+
+def _make_store(backend: str, workdir: str, database_url: str):
+    if backend == "memory":
+        return ChallengeStore(ttl=300, capacity=1_000_000)
+    if backend == "stateless":
+        return StatelessChallengeStore(b"benchmark-key", ttl=300, capacity=1_000_000)
+    if backend == "mmap":
+        return MmapChallengeStore(os.path.join(workdir, "challenges.bin"), ttl=300, capacity=1_000_000)
+    engine = create_engine(database_url)
+    return SQLChallengeStore(engine, ttl=300, capacity=1_000_000)
+
+def _worker(backend: str, workdir: str, database_url: str, ops: int) -> float:
+    store = _make_store(backend, workdir, database_url)
+    keys = ["02" + secrets.token_hex(32) for _ in range(ops)]
+    start = time.perf_counter()
+    for key in keys:
+        store.redeem(key, store.issue(key))
+    return time.perf_counter() - start
+
+def run(backend: str, ops: int, processes: int, database_url: str) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        if backend == "sql":
+            SQLModel.metadata.create_all(create_engine(database_url))
+        # Create the mmap file up front so workers attach to the same table
+        _make_store(backend, workdir, database_url)
+
+        if processes == 1:
+            elapsed = [_worker(backend, workdir, database_url, ops)]
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                elapsed = pool.starmap(_worker, [(backend, workdir, database_url, ops)] * processes)
+
+    total_ops = ops * processes
+    wall = max(elapsed)
+    return {
+        "backend": backend,
+        "processes": processes,
+        "issue_redeem_pairs": total_ops,
+        "seconds": round(wall, 4),
+        "pairs_per_sec": round(total_ops / wall, 1),
+        "us_per_pair": round(wall / ops * 1e6, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["memory", "stateless", "mmap", "sql"])
+    parser.add_argument("--ops", type=int, default=20_000, help="issue/redeem pairs per process")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        # An in-process store cannot be shared, so it is only measured in one process
+        processes = 1 if backend == "memory" else args.processes
+        ops = args.ops // 10 if backend == "sql" else args.ops
+        result = run(backend, ops, processes, args.database_url)
+        results.append(result)
+        print(f"{backend:<8} procs={processes:<3} {result['pairs_per_sec']:>12,.0f} pairs/s  "
+              f"{result['us_per_pair']:>9.2f} us/pair")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""Report which imports dominate worker start-up, from python -X importtime.
+
+Run from the backend directory:
+
+    python -m benchmarks.import_profile --top 25
+    python -m benchmarks.import_profile --module app.core.security --init-db
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+_INIT_DB_SNIPPET = """
+import time
+start = time.perf_counter()
+from app.db.session import init_db
+init_db()
+print(f"INIT_DB_MS {(time.perf_counter() - start) * 1000:.3f}")
+"""
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Rows of "import time: self [us] | cumulative | imported package" as dicts, in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+def profile(module: str, init_db: bool) -> Dict:
+    env = dict(os.environ, LOG_CONSOLE_LEVEL=os.environ.get("LOG_CONSOLE_LEVEL", "WARNING"))
+    code = f"import {module}" + (_INIT_DB_SNIPPET if init_db else "")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr[-2000:])
+
+    rows = parse_importtime(proc.stderr)
+    top_level = [row for row in rows if row["depth"] == 0]
+    report = {
+        "module": module,
+        "process_wall_ms": round(wall_ms, 1),
+        "import_ms": round(sum(row["cumulative_ms"] for row in top_level), 1),
+        "modules_imported": len(rows),
+        "rows": rows,
+    }
+    for line in proc.stdout.splitlines():
+        if line.startswith("INIT_DB_MS "):
+            report["init_db_ms"] = float(line.split()[1])
+    return report
+
+def _print_table(title: str, rows: List[Dict], key: str, top: int) -> None:
+    print(f"\n{title}")
+    for row in sorted(rows, key=lambda r: r[key], reverse=True)[:top]:
+        print(f"  {row[key]:>9.1f} ms  {row['module']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="module to import, as a worker would")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--init-db", action="store_true", help="also time init_db() after the import")
+    parser.add_argument("--json", dest="json_path", default=None, help="write the full report to this file")
+    args = parser.parse_args()
+
+    report = profile(args.module, args.init_db)
+    print(f"import {report['module']}: {report['import_ms']:.1f} ms over {report['modules_imported']} modules "
+          f"(process wall {report['process_wall_ms']:.1f} ms)")
+    if "init_db_ms" in report:
+        print(f"init_db: {report['init_db_ms']:.1f} ms")
+    _print_table("Slowest by cumulative time", report["rows"], "cumulative_ms", args.top)
+    _print_table("Slowest by own time", report["rows"], "self_ms", args.top)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
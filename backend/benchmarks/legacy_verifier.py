@@ -0,0 +1,109 @@
+"""Compare the pure-Python Schnorr verifier with the ecdsa-based original and with coincurve.
+
+Run from the backend directory:
+
+    python -m benchmarks.legacy_verifier --signatures 300 --pubkeys 30
+"""
+import argparse
+import hashlib
+import json
+import secrets
+import time
+from typing import Callable, List, Sequence
+
+import coincurve
+
+from app.core.secp256k1 import CURVE_ORDER, LegacySignature, verify_schnorr_batch, verify_schnorr_signature
+from app.core.security import decode_pubkey, schnorr_verify_combined
+
+def make_signatures(count: int, pubkeys: int) -> List[LegacySignature]:
+    """Valid r || s signatures over random messages, spread over a pool of keys."""
+    keys = [coincurve.PrivateKey() for _ in range(pubkeys)]
+    signatures = []
+    for i in range(count):
+        key = keys[i % len(keys)]
+        P = key.public_key.format()
+        message = secrets.token_bytes(32)
+        nonce = coincurve.PrivateKey()
+        r = nonce.public_key.format()[1:]
+        e = int.from_bytes(hashlib.sha256(r + P[1:] + message).digest(), "big") % CURVE_ORDER
+        s = (nonce.to_int() + e * key.to_int()) % CURVE_ORDER
+        signatures.append((P.hex(), (r + s.to_bytes(32, "big")).hex(), message))
+    return signatures
+
+def coincurve_verify(pubkey_hex: str, signature_hex: str, message: bytes) -> bool:
+    """The same x(s*G - e*P) == r check through security.schnorr_verify_combined."""
+    raw_pub = bytes.fromhex(pubkey_hex)
+    signature = bytes.fromhex(signature_hex)
+    r_bytes, s = signature[:32], int.from_bytes(signature[32:], "big")
+    e = int.from_bytes(hashlib.sha256(r_bytes + raw_pub[-32:] + message).digest(), "big") % CURVE_ORDER
+    P = decode_pubkey(raw_pub if len(raw_pub) == 33 else b"\x02" + raw_pub)
+    return schnorr_verify_combined(P, b"\x02" + r_bytes, s, pow(e, -1, CURVE_ORDER))
+
+def ecdsa_verifier() -> Callable[[str, str, bytes], bool]:
+    """The original affine verify_schnorr_signature from temp.py, for compressed keys."""
+    from ecdsa.curves import SECP256k1
+    from ecdsa.ellipticcurve import Point
+
+    p, n, G = SECP256k1.curve.p(), SECP256k1.order, SECP256k1.generator
+
+    def verify(pubkey_hex: str, signature_hex: str, message: bytes) -> bool:
+        raw_pub = bytes.fromhex(pubkey_hex)
+        x = int.from_bytes(raw_pub[1:], "big")
+        y2 = (pow(x, 3, p) + 7) % p
+        y0 = pow(y2, (p + 1) // 4, p)
+        P = Point(SECP256k1.curve, x, y0 if (y0 & 1) == (raw_pub[0] & 1) else p - y0)
+        sig = bytes.fromhex(signature_hex)
+        r, s = int.from_bytes(sig[:32], "big"), int.from_bytes(sig[32:], "big")
+        e = int.from_bytes(hashlib.sha256(sig[:32] + raw_pub[1:] + message).digest(), "big") % n
+        R = s * G + (-e) * P
+        return R.x() == r
+
+    return verify
+
+def _measure(name: str, fn: Callable[[Sequence[LegacySignature]], List[bool]], signatures: Sequence[LegacySignature]) -> dict:
+    start = time.perf_counter()
+    results = fn(signatures)
+    seconds = time.perf_counter() - start
+    assert all(results), f"{name} rejected a valid signature"
+    return {
+        "path": name,
+        "verifications": len(signatures),
+        "seconds": round(seconds, 4),
+        "verifs_per_sec": round(len(signatures) / seconds, 1),
+        "us_per_verify": round(seconds / len(signatures) * 1e6, 2),
+    }
+
+def run(count: int, pubkeys: int, batch_size: int) -> List[dict]:
+    signatures = make_signatures(count, pubkeys)
+    cases = [
+        ("pure_python", lambda items: [verify_schnorr_signature(*item) for item in items]),
+        (f"pure_python_batch{batch_size}",
+         lambda items: [ok for i in range(0, len(items), batch_size) for ok in verify_schnorr_batch(items[i:i + batch_size])]),
+        ("coincurve", lambda items: [coincurve_verify(*item) for item in items]),
+    ]
+    try:
+        verify = ecdsa_verifier()
+        cases.insert(0, ("ecdsa_affine", lambda items: [verify(*item) for item in items]))
+    except ImportError:
+        print("ecdsa is not installed, skipping the original verifier")
+    return [_measure(name, fn, signatures) for name, fn in cases]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signatures", type=int, default=300)
+    parser.add_argument("--pubkeys", type=int, default=30, help="distinct keys the signatures are spread over")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.signatures, args.pubkeys, args.batch_size)
+    for result in results:
+        print(f"{result['path']:<22} {result['verifs_per_sec']:>12,.0f} /s  {result['us_per_verify']:>10.2f} us")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
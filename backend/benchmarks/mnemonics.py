@@ -0,0 +1,68 @@
+"""Compare ways of serving the three recovery phrases behind /signup-mnemonics.
+
+    per_request  Mnemonic("english") built for every request, as the endpoint used to do
+    singleton    one shared Mnemonic, three generate() calls per request
+    pool         MnemonicPool.take(3) from a pre-filled pool (the refill runs off the request path)
+
+Run from the backend directory:
+
+    python -m benchmarks.mnemonics --requests 2000
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+from mnemonic import Mnemonic
+
+PHRASES_PER_REQUEST = 3
+
+def _measure(serve: Callable[[], List[str]], requests: int) -> Dict:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        serve()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "requests": requests,
+        "mean_us": round(sum(latencies) / requests * 1e6, 2),
+        "p50_us": round(latencies[requests // 2] * 1e6, 2),
+        "p99_us": round(latencies[min(requests - 1, int(requests * 0.99))] * 1e6, 2),
+        "requests_per_sec": round(requests / sum(latencies), 1),
+    }
+
+def run(requests: int) -> Dict:
+    from app.services.mnemonics import MnemonicPool
+
+    shared = Mnemonic("english")
+    # Sized so the measured takes never hit the inline fallback
+    pool = MnemonicPool(size=requests * PHRASES_PER_REQUEST, low_watermark=0)
+    pool.fill()
+
+    results = {
+        "per_request": _measure(lambda: [Mnemonic("english").generate(strength=128) for _ in range(PHRASES_PER_REQUEST)], requests),
+        "singleton": _measure(lambda: [shared.generate(strength=128) for _ in range(PHRASES_PER_REQUEST)], requests),
+        "pool": _measure(lambda: pool.take(PHRASES_PER_REQUEST), requests),
+    }
+    assert pool.generated_inline == 0
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.requests)
+    print(f"{'strategy':<12} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'req/s':>12}")
+    for name, stats in results.items():
+        print(f"{name:<12} {stats['mean_us']:>10.1f} {stats['p50_us']:>10.1f} {stats['p99_us']:>10.1f} "
+              f"{stats['requests_per_sec']:>12,.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
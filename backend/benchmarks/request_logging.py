@@ -0,0 +1,89 @@
+"""Measure per-request overhead of the access-log middleware.
+
+Compares a bare app, the previous BaseHTTPMiddleware logger (two f-strings
+and secrets.token_hex per request) and RequestLoggingMiddleware with and
+without sampling. Log output goes to a discarding sink so only the
+middleware and loguru's own cost are measured. Needs requirements-dev.txt.
+
+    python -m benchmarks.request_logging --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from loguru import logger
+
+from app.core.logs import RequestLoggingMiddleware
+
+def _bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+def _legacy_app() -> FastAPI:
+    app = _bare_app()
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        log_id = secrets.token_hex(4)
+        logger.info(f"RID {log_id} --> {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
+        response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        logger.info(f"RID {log_id} <-- {request.method} {request.url.path} - Status: {response.status_code} ({process_time:.2f}ms)")
+        return response
+
+    return app
+
+def _sampled_app(rate: float) -> FastAPI:
+    app = _bare_app()
+    app.add_middleware(RequestLoggingMiddleware, default_rate=rate)
+    return app
+
+async def _measure(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):
+            await client.get("/ping")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--enqueue", action="store_true", help="use an enqueued sink, as in production")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda _: None, level="INFO", enqueue=args.enqueue,
+               format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level:<8} | {name}:{function}:{line} - {message}")
+
+    variants = {
+        "bare": _bare_app(),
+        "legacy_http_middleware": _legacy_app(),
+        "asgi_rate_1.0": _sampled_app(1.0),
+        "asgi_rate_0.1": _sampled_app(0.1),
+    }
+    results = {name: asyncio.run(_measure(app, args.requests)) for name, app in variants.items()}
+    baseline = results["bare"]
+    for name, us in results.items():
+        print(f"{name:<24} {us:>9.1f} us/request  overhead {us - baseline:>8.1f} us")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({name: {"us_per_request": round(us, 2), "overhead_us": round(us - baseline, 2)}
+                       for name, us in results.items()}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
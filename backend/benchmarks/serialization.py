@@ -0,0 +1,91 @@
+"""Compare the cost of encoding a GET /api/users/ response body.
+
+    pydantic     List[UserResponse] validated from ORM objects and dumped by pydantic-core,
+                 what FastAPI does for a response_model route today
+    jsonable     the same validation, then jsonable_encoder and json.dumps, what older
+                 FastAPI releases (and any non-default response class) do
+    rows         RowSerializer(UserResponse) over column tuples with orjson, what the
+                 users routes use now
+
+Database reads are not included; every strategy starts from rows already in memory.
+Run from the backend directory:
+
+    python -m benchmarks.serialization --sizes 100 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+def _measure(encode: Callable[[], bytes], repeat: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "bytes": len(body),
+        "mean_ms": round(sum(timings) / repeat * 1000, 3),
+        "p50_ms": round(timings[repeat // 2] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+    }
+
+def run(sizes: List[int], repeat: int) -> Dict:
+    from app.api.responses import RowSerializer
+    from app.db.models import User
+    from app.schemas.user import UserResponse
+
+    adapter = TypeAdapter(List[UserResponse])
+    serializer = RowSerializer(UserResponse)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    results = {}
+    for size in sizes:
+        users = [
+            User(id=i, username=f"user_{i}", email=f"user_{i}@example.com", hashed_password="x" * 64,
+                 pubkey="02" + f"{i:064x}", created_at=start + timedelta(seconds=i))
+            for i in range(1, size + 1)
+        ]
+        rows = [tuple(getattr(u, c) for c in serializer.columns) for u in users]
+
+        strategies = {
+            "pydantic": lambda: adapter.dump_json(adapter.validate_python(users, from_attributes=True)),
+            "jsonable": lambda: json.dumps(
+                jsonable_encoder(adapter.validate_python(users, from_attributes=True)),
+                ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+            ).encode(),
+            "rows": lambda: serializer.dumps(rows),
+        }
+        expected = strategies["pydantic"]()
+        assert all(encode() == expected for encode in strategies.values()), "strategies disagree on the body"
+
+        runs = max(3, repeat * 100 // size) if size > 100 else repeat
+        results[str(size)] = {name: _measure(encode, runs) for name, encode in strategies.items()}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000], help="users per response")
+    parser.add_argument("--repeat", type=int, default=200, help="encodings of a 100-user page; scaled down for larger pages")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print(f"{'users':>7} {'strategy':<10} {'mean ms':>10} {'p50 ms':>10} {'min ms':>10} {'bytes':>10}")
+    for size, strategies in results.items():
+        for name, stats in strategies.items():
+            print(f"{size:>7} {name:<10} {stats['mean_ms']:>10.3f} {stats['p50_ms']:>10.3f} "
+                  f"{stats['min_ms']:>10.3f} {stats['bytes']:>10,}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""Measure Schnorr verifications per second per core for each verification path.
+
+Run from the backend directory:
+
+    python -m benchmarks.verification --proofs 2000 --pubkeys 200
+"""
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import time
+from typing import Callable, List, Sequence
+
+import coincurve
+
+from app.core.secp256k1 import BIP340_CHALLENGE_TAG, tagged_hash
+from app.core.security import (
+    SECP256K1_ORDER,
+    Bip340Proof,
+    SchnorrProof,
+    decode_pubkey,
+    decode_xonly_pubkey,
+    schnorr_batch_verify,
+    schnorr_encode_proofs,
+    schnorr_verify_many_encoded,
+    schnorr_verify_proof,
+    schnorr_verify_batch,
+    schnorr_verify_proofs,
+)
+
+def make_proofs(count: int, pubkeys: int) -> List[SchnorrProof]:
+    """Valid proofs from a pool of keys, so returning users show up in the pubkey cache."""
+    keys = [coincurve.PrivateKey() for _ in range(pubkeys)]
+    proofs = []
+    for i in range(count):
+        key = keys[i % len(keys)]
+        nonce = coincurve.PrivateKey()
+        P, R = key.public_key, nonce.public_key
+        e_bytes = hashlib.sha256(R.format() + P.format() + secrets.token_bytes(32)).digest()
+        e = int.from_bytes(e_bytes, "big") % SECP256K1_ORDER
+        s = (nonce.to_int() + e * key.to_int()) % SECP256K1_ORDER
+        proofs.append((P, R, s.to_bytes(32, "big"), e.to_bytes(32, "big")))
+    return proofs
+
+def make_bip340_proofs(count: int, pubkeys: int) -> List[Bip340Proof]:
+    keys = [coincurve.PrivateKey() for _ in range(pubkeys)]
+    proofs = []
+    for i in range(count):
+        key = keys[i % len(keys)]
+        challenge = secrets.token_bytes(32)
+        proofs.append((decode_xonly_pubkey(key.public_key_xonly.format()), key.sign_schnorr(challenge), challenge))
+    return proofs
+
+def naive_tagged_hash(tag: str, data: bytes) -> bytes:
+    tag_hash = hashlib.sha256(tag.encode()).digest()
+    return hashlib.sha256(tag_hash + tag_hash + data).digest()
+
+def two_multiplication_check(proof: SchnorrProof) -> bool:
+    """The previous check: s*G and e*P as separate multiplications, then R + e*P."""
+    public_key_point, R_point, s_bytes, e_bytes = proof
+    s_G = coincurve.PublicKey.from_secret(s_bytes)
+    expected = R_point.combine([public_key_point.multiply(e_bytes)])
+    return s_G.format() == expected.format()
+
+def _in_batches(fn: Callable[[Sequence], object], size: int) -> Callable[[Sequence], None]:
+    def run(items):
+        for i in range(0, len(items), size):
+            fn(items[i:i + size])
+    return run
+
+def _measure(name: str, fn: Callable[[Sequence], object], items: Sequence, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "path": name,
+        "verifications": len(items),
+        "seconds": round(best, 4),
+        "verifs_per_sec_per_core": round(len(items) / best, 1),
+        "us_per_verify": round(best / len(items) * 1e6, 2),
+    }
+
+def run(count: int, pubkeys: int, batch_size: int, repeat: int) -> List[dict]:
+    proofs = make_proofs(count, pubkeys)
+    encoded = schnorr_encode_proofs(proofs)
+    pubkey_bytes = [P for P, _, _, _ in encoded]
+    check_inputs = [(P, R.format(), s, e) for P, R, s, e in proofs]
+    bip340_proofs = make_bip340_proofs(count, pubkeys)
+    hash_inputs = [signature[:32] + P.format() + message for P, signature, message in bip340_proofs]
+    assert all(schnorr_verify_proofs(proofs + bip340_proofs)), "benchmark proofs must verify"
+
+    decode_pubkey.cache_clear()
+    for P in pubkey_bytes:
+        decode_pubkey(P)
+
+    cases = [
+        ("two_multiplications", lambda items: [two_multiplication_check(p) for p in items], proofs),
+        ("combined", lambda items: [schnorr_verify_proof(p) for p in items], proofs),
+        (f"combined_batch{batch_size}", _in_batches(schnorr_verify_proofs, batch_size), proofs),
+        (f"linear_combination_batch{batch_size}", _in_batches(schnorr_batch_verify, batch_size), check_inputs),
+        (f"api_batch{batch_size}", _in_batches(schnorr_verify_batch, batch_size), proofs),
+        (f"encoded_batch{batch_size}", _in_batches(schnorr_verify_many_encoded, batch_size), encoded),
+        ("bip340", lambda items: [schnorr_verify_proof(p) for p in items], bip340_proofs),
+        (f"bip340_batch{batch_size}", _in_batches(schnorr_verify_proofs, batch_size), bip340_proofs),
+        ("tagged_hash_naive", lambda items: [naive_tagged_hash(BIP340_CHALLENGE_TAG, d) for d in items], hash_inputs),
+        ("tagged_hash_midstate", lambda items: [tagged_hash(BIP340_CHALLENGE_TAG, d) for d in items], hash_inputs),
+        ("decode_pubkey_uncached", lambda items: [coincurve.PublicKey(P) for P in items], pubkey_bytes),
+        ("decode_pubkey_cached", lambda items: [decode_pubkey(P) for P in items], pubkey_bytes),
+    ]
+    return [_measure(name, fn, items, repeat) for name, fn, items in cases]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--proofs", type=int, default=2000)
+    parser.add_argument("--pubkeys", type=int, default=200, help="distinct keys the proofs are spread over")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.proofs, args.pubkeys, args.batch_size, args.repeat)
+    print(f"single process on a {os.cpu_count()}-core machine")
+    for result in results:
+        print(f"{result['path']:<28} {result['verifs_per_sec_per_core']:>12,.0f} /s  "
+              f"{result['us_per_verify']:>9.2f} us")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
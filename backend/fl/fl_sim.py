@@ -1,4 +1,7 @@
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
@@ -13,44 +16,86 @@ from flwr.server.strategy import FedAvg
 # Data Preparation
 # ======================
 
-def prepare_and_split(csv_file: str, client_name: str, test_size: float = 0.2):
-    """
-    Split the given CSV into train/test and save under client_datasets/<client_name>/
-    """
-    # Create client directory
-    base_dir = os.path.join("client_datasets", client_name)
-    os.makedirs(base_dir, exist_ok=True)
+SPLIT_SEED = 42
+ARRAY_NAMES = ("X_train", "y_train", "X_test", "y_test")
+# Name of the file in client_datasets/<client_name>/ holding the key of the current split
+CURRENT_FILE = "CURRENT"
 
-    # Paths
-    train_path = os.path.join(base_dir, "train.csv")
-    test_path = os.path.join(base_dir, "test.csv")
 
-    # Only split if not already done
-    if os.path.exists(train_path) and os.path.exists(test_path):
-        print(f"[INFO] Skipping split for {client_name}, files exist.")
-        return
-
-    # Load full dataset
-    df = pd.read_csv(csv_file)
-    # Split
-    train_df, test_df = train_test_split(df, test_size=test_size, random_state=42)
-    # Save
-    train_df.to_csv(train_path, index=False)
-    test_df.to_csv(test_path, index=False)
-    print(f"[INFO] Split {csv_file} → {train_path}, {test_path}")
+def split_key(csv_file: str, test_size: float) -> str:
+    """
+    Content hash of the source CSV plus the split parameters, so an edited CSV
+    or a different split gets its own cache directory.
+    """
+    digest = hashlib.sha256()
+    with open(csv_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(f"|test_size={test_size}|seed={SPLIT_SEED}".encode())
+    return digest.hexdigest()[:16]
 
 
-def prepare_all_clients():
+def prepare_and_split(csv_file: str, client_name: str, test_size: float = 0.2):
+    """
+    Split the given CSV into train/test and save the float32 arrays as .npy
+    under client_datasets/<client_name>/<split_key>/
+    """
+    base_dir = os.path.join("client_datasets", client_name)
+    key = split_key(csv_file, test_size)
+    split_dir = os.path.join(base_dir, key)
+
+    # Only split if this exact CSV and split are not cached yet
+    if all(os.path.exists(os.path.join(split_dir, f"{name}.npy")) for name in ARRAY_NAMES):
+        print(f"[INFO] Skipping split for {client_name}, cache {key} exists.")
+    else:
+        df = pd.read_csv(csv_file)
+        train_df, test_df = train_test_split(df, test_size=test_size, random_state=SPLIT_SEED)
+        arrays = {
+            "X_train": train_df.iloc[:, :-1].values.astype("float32"),
+            "y_train": train_df.iloc[:, -1].values.astype("float32"),
+            "X_test": test_df.iloc[:, :-1].values.astype("float32"),
+            "y_test": test_df.iloc[:, -1].values.astype("float32"),
+        }
+        # Write into a scratch directory and rename it, so readers never see a partial cache
+        tmp_dir = f"{split_dir}.tmp{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+        try:
+            os.rename(tmp_dir, split_dir)
+        except OSError:
+            # Fine if another process cached the same split first
+            if not all(os.path.exists(os.path.join(split_dir, f"{name}.npy")) for name in ARRAY_NAMES):
+                raise
+            for name in ARRAY_NAMES:
+                os.remove(os.path.join(tmp_dir, f"{name}.npy"))
+            os.rmdir(tmp_dir)
+        print(f"[INFO] Split {csv_file} → {split_dir}")
+
+    # Replace CURRENT atomically, so a concurrent load_client_data never reads it half written
+    current_path = os.path.join(base_dir, CURRENT_FILE)
+    tmp_path = f"{current_path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(key)
+    os.replace(tmp_path, current_path)
+    return split_dir
+
+
+def prepare_all_clients(max_workers: int = None):
     """
-    Prepare datasets for 3 clients by splitting the provided CSV files.
+    Prepare datasets for 3 clients by splitting the provided CSV files, one
+    process per client.
     """
     mappings = [
         ("pima-indians-diabetes.csv", "client1"),
         ("heart.csv", "client2"),
         ("wdbc.csv", "client3"),
     ]
-    for csv_file, client_name in mappings:
-        prepare_and_split(csv_file, client_name)
+    workers = max_workers or min(len(mappings), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(prepare_and_split, csv_file, client_name) for csv_file, client_name in mappings]
+        for future in futures:
+            future.result()
 
 
 # ======================
@@ -131,21 +176,23 @@ def load_client_data(client_id: int):
     Load train/test for a given client and return DataLoaders and input size.
     """
     base = os.path.join("client_datasets", f"client{client_id}")
-    train_df = pd.read_csv(os.path.join(base, "train.csv"))
-    test_df = pd.read_csv(os.path.join(base, "test.csv"))
-
-    X_train = train_df.iloc[:, :-1].values.astype("float32")
-    y_train = train_df.iloc[:, -1].values.astype("float32")
-    X_test = test_df.iloc[:, :-1].values.astype("float32")
-    y_test = test_df.iloc[:, -1].values.astype("float32")
+    with open(os.path.join(base, CURRENT_FILE)) as f:
+        split_dir = os.path.join(base, f.read().strip())
+
+    # Copy-on-write maps: pages come straight from the page cache and the
+    # tensors share them; torch needs a writable array to avoid copying
+    X_train, y_train, X_test, y_test = (
+        torch.from_numpy(np.load(os.path.join(split_dir, f"{name}.npy"), mmap_mode="c"))
+        for name in ARRAY_NAMES
+    )
 
     train_loader = DataLoader(
-        TensorDataset(torch.tensor(X_train), torch.tensor(y_train)),
+        TensorDataset(X_train, y_train),
         batch_size=32,
         shuffle=True,
     )
     test_loader = DataLoader(
-        TensorDataset(torch.tensor(X_test), torch.tensor(y_test)),
+        TensorDataset(X_test, y_test),
         batch_size=32,
     )
 
@@ -1,23 +1,22 @@
-import time
-import secrets
-from fastapi import FastAPI, Request, status
+import asyncio
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from loguru import logger
 
 from app.core.config import settings
-from app.db.session import init_db
+from app.core.challenges import run_expiry_loop
+from app.core.executors import shutdown_executors
+from app.core.logs import setup_logging, RequestLoggingMiddleware
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.security import challenge_store
+from app.services.mnemonics import mnemonic_pool
+from app.db.session import init_db, dispose_async_engine
 from app.api.router import api_router
+from app.api.responses import ORJSONResponse
+from app.api.endpoints.metrics import prometheus_router
 
-logger.add(
-    "logs/backend_{time:YYYY-MM-DD}.log", rotation="1 day", retention="7 days", level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level:<8} | {name}:{function}:{line} - {message}"
-)
-logger.add(
-    lambda msg: print(msg, end=""), level="INFO",
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level:<8}</level> | <cyan>{message}</cyan>",
-    colorize=True
-)
+setup_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -27,8 +26,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.critical(f"Database initialization failed: {e}. Application cannot start.")
         raise SystemExit(f"Database initialization failed: {e}") from e
+    expiry_task = asyncio.create_task(run_expiry_loop(challenge_store, settings.CHALLENGE_PURGE_INTERVAL))
+    mnemonic_pool.start()
     yield
+    expiry_task.cancel()
+    await mnemonic_pool.stop()
+    shutdown_executors()
+    await dispose_async_engine()
     logger.info("Application shutdown.")
+    await logger.complete()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -37,31 +43,30 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+if settings.RATE_LIMIT_ENABLED:
+    # Innermost, so 429/503 responses still get CORS headers and an access-log line
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers hide non-safelisted response headers unless they are exposed
+    expose_headers=["X-Next-Cursor"],
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    log_id = secrets.token_hex(4)
-    logger.info(f"RID {log_id} --> {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
-    try:
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        logger.info(f"RID {log_id} <-- {request.method} {request.url.path} - Status: {response.status_code} ({process_time:.2f}ms)")
-        return response
-    except Exception as e:
-        logger.error(f"RID {log_id} !!! {request.method} {request.url.path} - Unhandled Error: {e}")
-        raise
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rates=settings.LOG_SAMPLE_RATES,
+    default_rate=settings.LOG_SAMPLE_DEFAULT,
+)
 
 app.include_router(api_router, prefix=settings.API_PREFIX)
+app.include_router(prometheus_router)
 
-@app.get("/", include_in_schema=False)
+@app.get("/", include_in_schema=False, response_class=ORJSONResponse)
 async def root():
     return {"message": f"{settings.APP_NAME} is running."}
 
@@ -0,0 +1,84 @@
+"""Bulk-import users from a CSV or NDJSON file, straight into the database.
+
+Rows need username, email, hashed_password and pubkey (CSV header or JSON keys).
+Every row gets a result in the report: created, invalid, duplicate (repeated
+earlier in the file) or conflict (already registered).
+
+Run from the backend directory:
+
+    python -m scripts.import_users users.csv --report report.ndjson
+    python -m scripts.import_users users.ndjson --chunk-size 2000
+    cat users.ndjson | python -m scripts.import_users - --format ndjson
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from typing import Any, Iterator, TextIO
+
+FORMATS = ("csv", "ndjson")
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Any]:
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # Still one row, so the report lines up with the input; validation rejects it
+            yield line.rstrip("\n")
+
+def _detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="defaults to the file extension (.csv or NDJSON)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per uniqueness query and INSERT (BULK_SIGNUP_CHUNK_SIZE)")
+    parser.add_argument("--report", default=None, help="write one JSON result per input row to this file")
+    parser.add_argument("--init-db", action="store_true", help="create or migrate the schema first")
+    args = parser.parse_args()
+
+    from sqlmodel import Session
+    from app.core.logs import setup_logging
+    from app.db.session import engine, init_db
+    from app.services.bulk_signup import import_users
+
+    setup_logging()
+    if args.init_db:
+        init_db()
+
+    fmt = args.format or _detect_format(args.path)
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="" if fmt == "csv" else None)
+    report = open(args.report, "w") if args.report else None
+    counts: Counter = Counter()
+    start = time.perf_counter()
+    try:
+        with Session(engine) as session:
+            for result in import_users(session, read_rows(stream, fmt), args.chunk_size):
+                counts[result.status] += 1
+                if report:
+                    report.write(result.model_dump_json(exclude_none=True) + "\n")
+                elif result.status != "created":
+                    print(f"row {result.row}: {result.status}: {result.detail}", file=sys.stderr)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if report:
+            report.close()
+    seconds = time.perf_counter() - start
+
+    total = sum(counts.values())
+    breakdown = ", ".join(f"{status} {count}" for status, count in sorted(counts.items()))
+    print(f"{total} rows in {seconds:.2f}s ({total / seconds:,.0f} rows/s): {breakdown or 'nothing to import'}")
+    if total and counts["created"] < total:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
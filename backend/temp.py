@@ -640,6 +640,7 @@ from ecdsa import ellipticcurve, numbertheory, util
 from ecdsa.curves import SECP256k1
 from ecdsa.ellipticcurve import Point
 from ecdsa.util import number_to_string, string_to_number
+from app.core.secp256k1 import verify_schnorr_batch
 
 ecdsa_curve = SECP256k1
 p = ecdsa_curve.curve.p()
@@ -735,47 +736,10 @@ class LoginResponse(BaseModel):
 def hash_sha256(data: bytes) -> bytes:
     return hashlib.sha256(data).digest()
 
-def _lift_x_to_point(x: int, parity: int) -> ellipticcurve.Point:
-    # Solve y^2 = x^3 + 7 mod p, then pick the root matching parity
-    y2 = (pow(x, 3, p) + 7) % p
-    y0 = pow(y2, (p + 1) // 4, p)
-    y  = y0 if (y0 & 1) == parity else p - y0
-    # Point(curve, x, y)
-    return ellipticcurve.Point(ecdsa_curve.curve, x, y)
-
 def verify_schnorr_signature(pubkey_hex: str, signature_hex: str, message: bytes) -> bool:
-    raw_pub = bytes.fromhex(pubkey_hex)
-    # accept compressed(33) or x-only(32)
-    if len(raw_pub) == 33 and raw_pub[0] in (2, 3):
-        parity = raw_pub[0] & 1
-        x_bytes = raw_pub[1:]
-    elif len(raw_pub) == 32:
-        parity = 0
-        x_bytes = raw_pub
-    else:
-        raise ValueError("Invalid public key format")
-    x = int.from_bytes(x_bytes, 'big')
-    if x >= p:
-        return False
-    P = _lift_x_to_point(x, parity)
-
-    sig = bytes.fromhex(signature_hex)
-    if len(sig) != 64:
-        return False
-    r = int.from_bytes(sig[:32], 'big')
-    s = int.from_bytes(sig[32:], 'big')
-    if r >= p or s >= n:
-        return False
-
-    # compute e = int(hash(r || pubkey_x || message)) mod n
-    e_bytes = sha256(r.to_bytes(32, 'big') + x_bytes + message).digest()
-    e = int.from_bytes(e_bytes, 'big') % n
-
-    # R = s*G - e*P
-    R = s * G + (-e) * P
-    if R == ellipticcurve.INFINITY or (R.x() != r):
-        return False
-    return True
+    # Jacobian/wNAF engine with cached pubkey tables; same r || s format and
+    # e = sha256(r || x(P) || message) rule as the old ecdsa Point version
+    return verify_schnorr_batch([(pubkey_hex, signature_hex, message)])[0]
 
 def sign_schnorr(private_key: int, message: bytes) -> str:
     # naive deterministic nonce: hash(priv || msg)
@@ -0,0 +1,5 @@
+import os
+
+# Settings are read at import time; keep the tests off any real database and sinks
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CHALLENGE_BACKEND", "memory")
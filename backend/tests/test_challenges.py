@@ -0,0 +1,132 @@
+import secrets
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.challenges import (
+    ChallengeStore, MmapChallengeStore, SQLChallengeStore, StatelessChallengeStore, create_challenge_store,
+)
+from app.db.models import Challenge
+
+TTL = 60
+
+def pubkey() -> str:
+    return "02" + secrets.token_hex(32)
+
+def memory_store(tmp_path, capacity=1000):
+    return ChallengeStore(ttl=TTL, capacity=capacity, shards=4)
+
+def mmap_store(tmp_path, capacity=1000):
+    return MmapChallengeStore(str(tmp_path / "challenges.bin"), ttl=TTL, capacity=capacity, shards=4)
+
+def sql_store(tmp_path, capacity=1000):
+    engine = create_engine(f"sqlite:///{tmp_path / 'challenges.db'}")
+    Challenge.__table__.create(engine)
+    return SQLChallengeStore(engine, ttl=TTL, capacity=capacity)
+
+def stateless_store(tmp_path, capacity=1000):
+    return StatelessChallengeStore(secrets.token_bytes(32), ttl=TTL, capacity=capacity)
+
+STORES = [memory_store, mmap_store, sql_store, stateless_store]
+
+@pytest.fixture(params=STORES, ids=lambda factory: factory.__name__)
+def store(request, tmp_path):
+    return request.param(tmp_path)
+
+def test_issue_then_redeem_once(store):
+    key = pubkey()
+    challenge = store.issue(key)
+    assert store.redeem(key, challenge) is None
+    assert store.redeem(key, challenge) in ("no_challenge", "replayed")
+
+def test_redeem_rejects_other_challenge(store):
+    key = pubkey()
+    store.issue(key)
+    assert store.redeem(key, secrets.token_hex(32)) in ("challenge_mismatch", "invalid_challenge")
+
+def test_redeem_without_issue(store):
+    assert store.redeem(pubkey(), secrets.token_hex(32)) in ("no_challenge", "invalid_challenge")
+
+def test_challenge_bound_to_pubkey(store):
+    challenge = store.issue(pubkey())
+    assert store.redeem(pubkey(), challenge) is not None
+
+def test_expired_challenge_is_rejected(store):
+    key = pubkey()
+    challenge = store.issue(key)
+    assert store.redeem(key, challenge, now=time.time() + TTL + 1) == "expired"
+
+@pytest.mark.parametrize("factory", [memory_store, mmap_store, sql_store], ids=lambda f: f.__name__)
+def test_reissue_replaces_challenge(factory, tmp_path):
+    store = factory(tmp_path)
+    key = pubkey()
+    first = store.issue(key)
+    second = store.issue(key)
+    assert first != second
+    assert store.redeem(key, second) is None
+
+@pytest.mark.parametrize("factory", [memory_store, mmap_store, sql_store], ids=lambda f: f.__name__)
+def test_purge_expired(factory, tmp_path):
+    store = factory(tmp_path)
+    keys = [pubkey() for _ in range(5)]
+    for key in keys:
+        store.issue(key)
+    assert len(store) == 5
+    assert store.purge_expired(now=time.time() + TTL + 1) == 5
+    assert len(store) == 0
+
+def test_sql_size_is_the_count_from_the_last_sweep(tmp_path):
+    store = sql_store(tmp_path, capacity=3)
+    for _ in range(5):
+        store.issue(pubkey())
+    assert store.size() == 0
+    store.purge_expired()
+    assert store.size() == len(store) == 3
+    assert store.stats()["size"] == 3
+
+def test_stateless_challenges_verify_on_another_instance_with_the_key():
+    key = secrets.token_bytes(32)
+    issuer, verifier = StatelessChallengeStore(key, ttl=TTL), StatelessChallengeStore(key, ttl=TTL)
+    pubkey_hex = pubkey()
+    challenge = issuer.issue(pubkey_hex)
+    assert StatelessChallengeStore(secrets.token_bytes(32), ttl=TTL).redeem(pubkey_hex, challenge) == "invalid_challenge"
+    assert verifier.redeem(pubkey_hex, challenge) is None
+    assert verifier.redeem(pubkey_hex, challenge) == "replayed"
+
+def test_stateless_backend_requires_a_secret(tmp_path):
+    with pytest.raises(RuntimeError, match="CHALLENGE_SECRET"):
+        create_challenge_store("stateless", TTL, 1000, 4, str(tmp_path / "unused.bin"))
+
+def test_stateless_challenge_tampering_is_detected(tmp_path):
+    store = stateless_store(tmp_path)
+    pubkey_hex = pubkey()
+    raw = bytearray.fromhex(store.issue(pubkey_hex))
+    # Pushing the expiry back by a byte invalidates the MAC
+    raw[StatelessChallengeStore.NONCE_SIZE] ^= 1
+    assert store.redeem(pubkey_hex, raw.hex()) == "invalid_challenge"
+    assert store.redeem(pubkey_hex, "zz") == "invalid_challenge"
+
+def test_stateless_replay_is_remembered_across_a_rotation(tmp_path):
+    store = stateless_store(tmp_path)
+    pubkey_hex = pubkey()
+    challenge = store.issue(pubkey_hex)
+    assert store.redeem(pubkey_hex, challenge) is None
+    store.purge_expired(now=time.time() + TTL + 1)
+    assert store.redeem(pubkey_hex, challenge, now=time.time() + TTL / 2) == "replayed"
+    assert len(store) == 0
+
+@pytest.mark.parametrize("factory", [memory_store, mmap_store], ids=lambda f: f.__name__)
+def test_full_store_evicts_oldest(factory, tmp_path):
+    store = factory(tmp_path, capacity=64)
+    keys = [pubkey() for _ in range(200)]
+    issued = {}
+    for i, key in enumerate(keys):
+        challenge = secrets.token_hex(32)
+        store.put(key, challenge, issued_at=time.time() - 200 + i)
+        issued[key] = challenge
+    assert len(store) <= 64
+    assert store.stats()["evicted"] >= 200 - 64
+    # The newest challenge always survives; the oldest is long gone
+    assert store.redeem(keys[-1], issued[keys[-1]]) is None
+    assert store.redeem(keys[0], issued[keys[0]]) == "no_challenge"
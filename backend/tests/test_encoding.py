@@ -0,0 +1,40 @@
+import base64
+
+import pytest
+
+from pydantic import BaseModel, EmailStr, ValidationError
+
+from app.core.encoding import binary_decoder
+from app.schemas.types import _pubkey
+from app.schemas.user import UserUpdate
+
+RAW = bytes.fromhex("02" + "ab" * 32)
+
+@pytest.mark.parametrize("spelling", [
+    RAW.hex(),
+    RAW.hex().upper(),
+    base64.b64encode(RAW).decode(),
+    base64.urlsafe_b64encode(RAW).decode(),
+])
+def test_every_spelling_decodes_to_lowercase_hex(spelling):
+    decoded = _pubkey(spelling)
+    assert decoded == RAW.hex()
+    assert decoded.raw == RAW
+
+@pytest.mark.parametrize("value", ["zz" * 33, "02" + " a" * 32, "A" * 43])
+def test_malformed_values_are_rejected(value):
+    with pytest.raises(ValueError):
+        binary_decoder((33,))(value)
+
+class _Reference(BaseModel):
+    email: EmailStr
+
+@pytest.mark.parametrize("email", ["A.B@Example.COM", "user+tag@sub.example.org", "x@bücher.example"])
+def test_email_matches_email_str(email):
+    assert UserUpdate(email=email).email == _Reference(email=email).email
+    assert UserUpdate.model_json_schema()["properties"]["email"]["anyOf"][0]["format"] == "email"
+
+@pytest.mark.parametrize("email", ["nope", "a@b", "@example.com"])
+def test_invalid_email_is_rejected(email):
+    with pytest.raises(ValidationError):
+        UserUpdate(email=email)
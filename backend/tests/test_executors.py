@@ -0,0 +1,51 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.core.executors import InstrumentedExecutor
+from app.core.security import schnorr_encode_proofs, schnorr_verify_many_encoded
+from tests.test_security import make_proofs
+
+def _die() -> None:
+    os._exit(1)
+
+def _pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+@pytest.fixture
+def executor():
+    executor = InstrumentedExecutor("verify", _pool, 1)
+    yield executor
+    executor.shutdown()
+
+def test_verification_succeeds_after_a_worker_is_killed(executor):
+    proofs = schnorr_encode_proofs(make_proofs(4))
+
+    async def scenario():
+        assert await executor.run(schnorr_verify_many_encoded, proofs) == [True] * 4
+        for pid in list(executor.executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        # Give the pool's manager thread time to notice and mark the pool broken
+        time.sleep(0.5)
+        return await executor.run(schnorr_verify_many_encoded, proofs)
+
+    assert asyncio.run(scenario()) == [True] * 4
+    assert executor.stats()["restarts"] == 1
+    assert executor.stats()["failed"] == 0
+
+def test_a_call_that_kills_its_worker_is_retried_once(executor):
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(_die)
+        return await executor.run(schnorr_verify_many_encoded, schnorr_encode_proofs(make_proofs(2)))
+
+    assert asyncio.run(scenario()) == [True, True]
+    # The crash repeats on the fresh pool, so the second broken pool is replaced by the next call
+    assert executor.stats()["restarts"] == 2
+    assert executor.stats()["failed"] == 1
@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, Registry, _Metric
+
+def test_labeled_counter_sums_threads():
+    counter = Counter("test_total", "Test counter", ("reason",))
+    threads = [threading.Thread(target=lambda: [counter.labels("a").inc() for _ in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.labels(reason="b").inc(2)
+    lines = counter.render()
+    assert 'test_total{reason="a"} 400' in lines
+    assert 'test_total{reason="b"} 2' in lines
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_count 3" in lines
+
+def test_registry_renders_gauges_with_a_function_only():
+    registry = Registry()
+    registry.register(Gauge("test_unset", "Not set"))
+    registry.register(Gauge("test_size", "Size", lambda: 7))
+    text = registry.render()
+    assert "test_unset" not in text
+    assert "test_size 7\n" in text
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("test", "Abstract")
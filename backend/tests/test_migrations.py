@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.migrations import SCHEMA_VERSION, MigrationError, run_migrations
+from app.db.models import SchemaVersion
+
+# e.g. postgresql+psycopg2://postgres@/fizk_test?host=/tmp/pgdata; the database is emptied first
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+LEGACY_USER_TABLE = """
+CREATE TABLE "user" (
+    id INTEGER PRIMARY KEY, username VARCHAR(100) NOT NULL, email VARCHAR(255) NOT NULL,
+    hashed_password VARCHAR(255) NOT NULL, pubkey VARCHAR(66) NOT NULL, created_at TIMESTAMP NOT NULL
+)
+"""
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def bind(request, tmp_path):
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path / 'fizk.db'}")
+    elif POSTGRES_URL:
+        engine = create_engine(POSTGRES_URL)
+        with engine.begin() as conn:
+            conn.execute(text('DROP TABLE IF EXISTS "user", schema_version'))
+    else:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    SchemaVersion.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_USER_TABLE))
+    yield engine
+    engine.dispose()
+
+def insert_users(bind, *rows):
+    with bind.begin() as conn:
+        for i, (email, pubkey) in enumerate(rows, 1):
+            conn.execute(text(
+                'INSERT INTO "user" (id, username, email, hashed_password, pubkey, created_at) '
+                "VALUES (:id, :username, :email, 'h', :pubkey, CURRENT_TIMESTAMP)"
+            ), {"id": i, "username": f"user{i}", "email": email, "pubkey": pubkey})
+
+def test_legacy_table_is_brought_up_to_date(bind):
+    insert_users(bind, ("a@example.com", "02AB"), ("b@example.com", "03cd"))
+    assert run_migrations(bind)
+
+    columns = {column["name"] for column in inspect(bind).get_columns("user")}
+    indexes = {index["name"]: index["unique"] for index in inspect(bind).get_indexes("user")}
+    with bind.connect() as conn:
+        versions = conn.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+        rows = conn.execute(text('SELECT pubkey, updated_at FROM "user" ORDER BY id')).all()
+    assert "updated_at" in columns
+    assert all(indexes[name] for name in ("ix_user_username", "ix_user_email", "ix_user_pubkey"))
+    assert versions == list(range(1, SCHEMA_VERSION + 1))
+    assert [pubkey for pubkey, _ in rows] == ["02ab", "03cd"]
+    assert all(updated_at is not None for _, updated_at in rows)
+
+    # A second runner finds nothing to do
+    assert not run_migrations(bind)
+
+def test_duplicates_are_reported_and_the_run_can_be_repeated(bind):
+    insert_users(bind, ("a@example.com", "02aa"), ("a@example.com", "02bb"))
+    with pytest.raises(MigrationError, match="a@example.com"):
+        run_migrations(bind)
+
+    with bind.begin() as conn:
+        conn.execute(text("""UPDATE "user" SET email = 'b@example.com' WHERE id = 2"""))
+    assert run_migrations(bind)
+    with bind.connect() as conn:
+        assert conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() == SCHEMA_VERSION
@@ -0,0 +1,34 @@
+import base64
+
+import pytest
+
+from app.api.utils import decode_cursor, encode_cursor
+from app.core.exceptions import ValidationError
+
+@pytest.mark.parametrize("last_id", [0, 1, 42, 2**31, 2**63 - 1])
+def test_cursor_round_trip(last_id):
+    cursor = encode_cursor(last_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == last_id
+
+@pytest.mark.parametrize("cursor", [None, ""])
+def test_missing_cursor_is_first_page(cursor):
+    assert decode_cursor(cursor) is None
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    "é",
+    _b64(b"not json"),
+    _b64(b"[1]"),
+    _b64(b'{"offset":1}'),
+    _b64(b'{"id":"5"}'),
+    _b64(b'{"id":1.5}'),
+    _b64(b'{"id":true}'),
+    _b64(b'{"id":-1}'),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValidationError):
+        decode_cursor(cursor)
@@ -0,0 +1,129 @@
+import hashlib
+import secrets
+
+import coincurve
+import pytest
+
+from app.core.secp256k1 import (
+    BIP340_CHALLENGE_TAG,
+    CURVE_ORDER,
+    FIELD_PRIME,
+    decode_pubkey,
+    lift_x,
+    tagged_hash,
+    verify_bip340,
+    verify_schnorr_batch,
+    verify_schnorr_signature,
+)
+
+def legacy_signature(key: coincurve.PrivateKey, message: bytes, compressed: bool = True):
+    """r || s with e = sha256(r || x(P) || message), as temp.py's sign_schnorr produces."""
+    P = key.public_key.format()
+    nonce = coincurve.PrivateKey()
+    r = nonce.public_key.format()[1:]
+    e = int.from_bytes(hashlib.sha256(r + P[1:] + message).digest(), "big") % CURVE_ORDER
+    s = (nonce.to_int() + e * key.to_int()) % CURVE_ORDER
+    return (P if compressed else P[1:]).hex(), (r + s.to_bytes(32, "big")).hex()
+
+def test_legacy_signatures_verify():
+    for _ in range(10):
+        key, message = coincurve.PrivateKey(), secrets.token_bytes(32)
+        pubkey, signature = legacy_signature(key, message)
+        assert verify_schnorr_signature(pubkey, signature, message)
+        assert not verify_schnorr_signature(pubkey, signature, secrets.token_bytes(32))
+
+def test_legacy_x_only_key_is_even_y():
+    key = coincurve.PrivateKey()
+    even = key if key.public_key.format()[0] == 2 else coincurve.PrivateKey.from_int(CURVE_ORDER - key.to_int())
+    message = secrets.token_bytes(32)
+    pubkey, signature = legacy_signature(even, message, compressed=False)
+    assert verify_schnorr_signature(pubkey, signature, message)
+
+def test_legacy_batch_reports_each_signature():
+    key = coincurve.PrivateKey()
+    items = []
+    for i in range(6):
+        message = secrets.token_bytes(32)
+        pubkey, signature = legacy_signature(key, message)
+        items.append((pubkey, signature, message if i != 3 else b"other"))
+    items.append(("zz", "00" * 64, b""))
+    items.append(("04" + "00" * 32, "00" * 64, b""))
+    assert verify_schnorr_batch(items) == [True, True, True, False, True, True, False, False]
+
+def test_out_of_range_scalars_are_rejected():
+    key, message = coincurve.PrivateKey(), secrets.token_bytes(32)
+    pubkey, signature = legacy_signature(key, message)
+    r = signature[:64]
+    assert not verify_schnorr_signature(pubkey, r + CURVE_ORDER.to_bytes(32, "big").hex(), message)
+    assert not verify_schnorr_signature(pubkey, FIELD_PRIME.to_bytes(32, "big").hex() + signature[64:], message)
+
+def test_lift_x_matches_coincurve():
+    for _ in range(10):
+        encoded = coincurve.PrivateKey().public_key.format(compressed=False)
+        x, y = int.from_bytes(encoded[1:33], "big"), int.from_bytes(encoded[33:], "big")
+        assert lift_x(x, y & 1) == (x, y)
+        assert decode_pubkey(bytes([2 + (y & 1)]) + encoded[1:33]) == (x, y)
+
+def test_lift_x_rejects_x_off_the_curve():
+    # x = 5 has no y on secp256k1 (5^3 + 7 is not a square mod p)
+    assert lift_x(5, 0) is None
+    assert lift_x(FIELD_PRIME, 0) is None
+
+def test_invalid_pubkey_length_raises():
+    with pytest.raises(ValueError):
+        decode_pubkey(b"\x04" * 65)
+
+# Test vector 0 from the BIP-340 reference test-vectors.csv (secret key 3, zero aux and message)
+BIP340_VECTOR = (
+    bytes.fromhex("F9308A019258C31049344F85F89D5229B531C845836F99B08601F113BCE036F9"),
+    bytes.fromhex("E907831F80848D1069A5371B402410364BDF1C5F8307B0084C55F1CE2DCA8215"
+                  "25F66A4A85EA8B71E482A74F382D2CE5EBEEE8FDB2172F477DF4900D310536C0"),
+    bytes(32),
+)
+
+def test_tagged_hash_midstate_matches_definition():
+    tag_hash = hashlib.sha256(BIP340_CHALLENGE_TAG.encode()).digest()
+    for data in (b"", b"x" * 31, secrets.token_bytes(96)):
+        assert tagged_hash(BIP340_CHALLENGE_TAG, data) == hashlib.sha256(tag_hash + tag_hash + data).digest()
+
+def test_bip340_reference_vector():
+    pubkey, signature, message = BIP340_VECTOR
+    assert verify_bip340(pubkey, signature, message)
+    assert not verify_bip340(pubkey, signature, b"\x01" + message[1:])
+
+def test_bip340_agrees_with_coincurve():
+    for _ in range(10):
+        key, message = coincurve.PrivateKey(), secrets.token_bytes(32)
+        pubkey, signature = key.public_key_xonly.format(), key.sign_schnorr(message)
+        xonly = coincurve.PublicKeyXOnly(pubkey)
+        forged = signature[:32] + ((int.from_bytes(signature[32:], "big") + 1) % CURVE_ORDER).to_bytes(32, "big")
+        for candidate in (signature, forged):
+            assert verify_bip340(pubkey, candidate, message) == xonly.verify(candidate, message)
+        assert verify_bip340(pubkey, signature, message)
+
+def test_bip340_rejects_odd_y_commitment():
+    """A signature whose R has odd y matches on x alone, but BIP-340 requires even y."""
+    key = coincurve.PrivateKey()
+    d = key.to_int() if key.public_key.format()[0] == 2 else CURVE_ORDER - key.to_int()
+    pubkey = key.public_key_xonly.format()
+    message = secrets.token_bytes(32)
+    while True:
+        nonce = coincurve.PrivateKey()
+        R = nonce.public_key.format()
+        if R[0] == 3:
+            break
+    e = int.from_bytes(tagged_hash(BIP340_CHALLENGE_TAG, R[1:] + pubkey + message), "big") % CURVE_ORDER
+    s = (nonce.to_int() + e * d) % CURVE_ORDER
+    signature = R[1:] + s.to_bytes(32, "big")
+    assert not verify_bip340(pubkey, signature, message)
+    assert not coincurve.PublicKeyXOnly(pubkey).verify(signature, message)
+    # The same nonce negated gives the even-y R with the same x, which does verify
+    s = (CURVE_ORDER - nonce.to_int() + e * d) % CURVE_ORDER
+    assert verify_bip340(pubkey, R[1:] + s.to_bytes(32, "big"), message)
+
+def test_bip340_rejects_malformed_input():
+    pubkey, signature, message = BIP340_VECTOR
+    assert not verify_bip340(pubkey[:31], signature, message)
+    assert not verify_bip340(pubkey, signature[:63], message)
+    assert not verify_bip340((5).to_bytes(32, "big"), signature, message)
+    assert not verify_bip340(pubkey, signature[:32] + CURVE_ORDER.to_bytes(32, "big"), message)
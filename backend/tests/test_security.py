@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import secrets
+
+import coincurve
+import pytest
+
+from app.core.config import settings
+from app.core.security import (
+    SECP256K1_ORDER,
+    SchnorrBatchVerifier,
+    schnorr_batch_verify,
+    schnorr_encode_proofs,
+    schnorr_verify_batch,
+    schnorr_verify_combined,
+    schnorr_verify_many_encoded,
+    schnorr_verify_proofs,
+)
+
+def make_proof(key: coincurve.PrivateKey):
+    nonce = coincurve.PrivateKey()
+    P, R = key.public_key, nonce.public_key
+    e_bytes = hashlib.sha256(R.format() + P.format() + secrets.token_bytes(32)).digest()
+    e = int.from_bytes(e_bytes, "big") % SECP256K1_ORDER
+    s = (nonce.to_int() + e * key.to_int()) % SECP256K1_ORDER
+    return P, R, s.to_bytes(32, "big"), e.to_bytes(32, "big")
+
+def make_proofs(count: int, pubkeys: int = 3):
+    keys = [coincurve.PrivateKey() for _ in range(pubkeys)]
+    return [make_proof(keys[i % pubkeys]) for i in range(count)]
+
+def negate(point: coincurve.PublicKey) -> coincurve.PublicKey:
+    encoded = point.format()
+    return coincurve.PublicKey(bytes([encoded[0] ^ 1]) + encoded[1:])
+
+def reference_check(proof) -> bool:
+    """s*G == R + e*P with two separate multiplications."""
+    P, R, s_bytes, e_bytes = proof
+    return coincurve.PublicKey.from_secret(s_bytes).format() == R.combine([P.multiply(e_bytes)]).format()
+
+def combined(proof) -> bool:
+    P, R, s_bytes, e_bytes = proof
+    e_inv = pow(int.from_bytes(e_bytes, "big"), -1, SECP256K1_ORDER)
+    return schnorr_verify_combined(P, R.format(), int.from_bytes(s_bytes, "big"), e_inv)
+
+def tamper(proof):
+    P, R, s_bytes, e_bytes = proof
+    s = (int.from_bytes(s_bytes, "big") + 1) % SECP256K1_ORDER
+    return P, R, s.to_bytes(32, "big"), e_bytes
+
+def test_combined_check_matches_coincurve():
+    proofs = make_proofs(20, pubkeys=20)
+    for i in range(0, 20, 2):
+        proofs[i] = tamper(proofs[i])
+    assert [combined(proof) for proof in proofs] == [reference_check(proof) for proof in proofs]
+    assert [combined(proof) for proof in proofs] == [i % 2 == 1 for i in range(20)]
+
+def test_combined_check_rejects_wrong_key():
+    P, R, s, e = make_proof(coincurve.PrivateKey())
+    assert not combined((coincurve.PrivateKey().public_key, R, s, e))
+    assert not combined((negate(P), R, s, e))
+
+def test_negated_commitment():
+    # The combined check only compares x, so -R passes for the same e (as documented) ...
+    P, R, s, e = make_proof(coincurve.PrivateKey())
+    assert combined((P, negate(R), s, e))
+    assert not reference_check((P, negate(R), s, e))
+    # ... but e is hashed over the encoding of R the client sent, so swapping in -R fails
+    challenge = secrets.token_bytes(32)
+    key, nonce = coincurve.PrivateKey(), coincurve.PrivateKey()
+    P, R = key.public_key, nonce.public_key
+    e = int.from_bytes(hashlib.sha256(R.format() + P.format() + challenge).digest(), "big") % SECP256K1_ORDER
+    s = ((nonce.to_int() + e * key.to_int()) % SECP256K1_ORDER).to_bytes(32, "big")
+    e_forged = hashlib.sha256(negate(R).format() + P.format() + challenge).digest()
+    assert schnorr_verify_proofs([(P, R, s, e.to_bytes(32, "big"))]) == [True]
+    assert schnorr_verify_proofs([(P, negate(R), s, e_forged)]) == [False]
+
+def test_linear_combination_accepts_valid_batch(linear_combination):
+    proofs = make_proofs(10)
+    assert schnorr_batch_verify([(P, R.format(), s, e) for P, R, s, e in proofs])
+    assert schnorr_verify_batch(proofs) == [True] * 10
+
+def test_linear_combination_rejects_one_bad_proof():
+    proofs = make_proofs(10)
+    proofs[4] = tamper(proofs[4])
+    assert not schnorr_batch_verify([(P, R.format(), s, e) for P, R, s, e in proofs])
+
+@pytest.fixture(params=[False, True], ids=["per_proof", "linear_combination"])
+def linear_combination(request, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_BATCH_LINEAR_COMBINATION", request.param)
+    return request.param
+
+def test_batch_falls_back_to_per_proof_results(linear_combination):
+    proofs = make_proofs(10)
+    proofs[2] = tamper(proofs[2])
+    proofs[7] = tamper(proofs[7])
+    expected = [i not in (2, 7) for i in range(10)]
+    assert schnorr_verify_batch(proofs) == expected
+    assert schnorr_verify_proofs(proofs) == expected
+    assert schnorr_verify_many_encoded(schnorr_encode_proofs(proofs)) == expected
+
+def test_batch_mixes_bip340_proofs(linear_combination):
+    key = coincurve.PrivateKey()
+    challenge = secrets.token_bytes(32)
+    bip340 = (coincurve.PublicKeyXOnly(key.public_key_xonly.format()), key.sign_schnorr(challenge), challenge)
+    forged = (bip340[0], bip340[1], secrets.token_bytes(32))
+    proofs = make_proofs(4) + [bip340, forged]
+    assert schnorr_verify_batch(proofs) == [True, True, True, True, True, False]
+
+def test_batch_verifier_coalesces_concurrent_proofs():
+    proofs = make_proofs(5)
+    proofs[1] = tamper(proofs[1])
+    verifier = SchnorrBatchVerifier(max_batch_size=64, max_delay=0.01)
+
+    async def verify_all():
+        return await asyncio.gather(*(verifier.verify(proof) for proof in proofs))
+
+    assert asyncio.run(verify_all()) == [True, False, True, True, True]
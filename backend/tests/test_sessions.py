@@ -0,0 +1,75 @@
+import base64
+import secrets
+import time
+
+import pytest
+
+from app.core.sessions import SessionManager, create_session_manager
+
+TTL = 900
+
+@pytest.fixture
+def manager():
+    return SessionManager(secrets.token_bytes(32), ttl=TTL, revocation_capacity=1000)
+
+def _flip(token: str, index: int) -> str:
+    raw = bytearray(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    raw[index] ^= 1
+    return base64.urlsafe_b64encode(bytes(raw)).rstrip(b"=").decode()
+
+def test_issued_token_validates(manager):
+    now = time.time()
+    token, expires_at = manager.issue(42, now=now)
+    assert expires_at == int(now + TTL)
+    claims, reason = manager.validate(token, now=now)
+    assert reason is None
+    assert (claims.user_id, claims.expires_at) == (42, expires_at)
+
+def test_tokens_are_unique(manager):
+    assert manager.issue(1)[0] != manager.issue(1)[0]
+
+def test_expired_token_is_rejected(manager):
+    now = time.time()
+    token, expires_at = manager.issue(1, now=now)
+    assert manager.validate(token, now=expires_at)[1] is None
+    assert manager.validate(token, now=expires_at + 1) == (None, "expired")
+
+@pytest.mark.parametrize("index", [1, 8, 9, 16, 17, 33, 64])
+def test_tampered_token_is_rejected(manager, index):
+    # Bytes of the user id, expiry, token id and MAC; the version byte is checked first
+    token, _ = manager.issue(7)
+    assert manager.validate(_flip(token, index)) == (None, "bad_signature")
+
+def test_token_from_another_key_is_rejected(manager):
+    other = SessionManager(secrets.token_bytes(32), ttl=TTL)
+    token, _ = other.issue(7)
+    assert manager.validate(token) == (None, "bad_signature")
+
+@pytest.mark.parametrize("token", ["", "not-a-token", "A" * 10, "A" * 87])
+def test_malformed_token_is_rejected(manager, token):
+    assert manager.validate(token) == (None, "malformed")
+
+def test_unknown_version_is_rejected(manager):
+    token, _ = manager.issue(7)
+    assert manager.validate(_flip(token, 0)) == (None, "malformed")
+
+def test_revoked_token_is_rejected_until_it_expires(manager):
+    token, expires_at = manager.issue(7)
+    other, _ = manager.issue(7)
+    claims, _ = manager.validate(token)
+    manager.revoke(claims)
+    manager.revoke(claims)
+    assert manager.validate(token) == (None, "revoked")
+    assert manager.validate(token, now=expires_at) == (None, "revoked")
+    assert manager.validate(other)[1] is None
+    assert manager.stats()["revoked"] == 1
+
+@pytest.mark.parametrize("debug, workers", [(False, 1), (True, 2)])
+def test_missing_secret_is_refused_outside_single_worker_debug(debug, workers):
+    with pytest.raises(RuntimeError, match="SESSION_SECRET"):
+        create_session_manager(None, TTL, 1000, debug=debug, workers=workers)
+
+def test_missing_secret_falls_back_to_a_process_key_in_debug():
+    manager = create_session_manager(None, TTL, 1000, debug=True, workers=1)
+    token, _ = manager.issue(7)
+    assert manager.validate(token)[1] is None